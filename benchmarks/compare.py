@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+"""
+Compare Rally-style benchmark results and flag performance regressions.
+
+Reads any number of result files in either format found in this directory:
+  *.csv   Lap,Metric,Task,Value,Unit rows (Rally CSV, validate.py --benchmark)
+  *.rep   Rally's markdown report table (| Lap | Metric | Task | Value | Unit |)
+
+The first file is the baseline; every other file is compared with it. Rows
+are aligned on (Lap, Task, Metric), so multi-lap reports such as loadgen.py
+runs with several --rate values are compared lap by lap, and each pair gets
+a difference and a ratio.
+Whether a change is a regression depends on the metric: throughput should go
+up, while latency, service time, error rate, indexing/merge/refresh/GC time
+and sizes should go down. Counts and other metrics are shown but never
+flagged. --min-delta adds an absolute floor that a change must also exceed,
+to ignore noise on tiny values. A zero baseline has no relative change, so
+there a lower-is-better metric (such as error rate going from 0% to 5%) is
+flagged whenever it grows by more than --min-delta.
+
+Exits with status 1 if any contender regressed by more than --threshold on
+a selected metric, so engine upgrades can be gated on performance.
+
+Usage:
+    python benchmarks/compare.py benchmarks/elk-geonames1.csv benchmarks/odfe-geonames1.csv
+    python benchmarks/compare.py base.rep new.csv --threshold 0.05 \\
+        --metric "90th percentile latency" --task "term|phrase|scroll"
+"""
+
+import argparse
+import csv
+import re
+import sys
+from pathlib import Path
+
+HIGHER_IS_BETTER = re.compile(r"throughput", re.IGNORECASE)
+LOWER_IS_BETTER = re.compile(
+    r"latency|service time|error rate|time of primary shards|"
+    r"time across primary shards|gc|heap used|store size|translog size",
+    re.IGNORECASE,
+)
+
+
+def metric_direction(metric: str) -> int:
+    """+1 if higher is better, -1 if lower is better, 0 if neither."""
+    if HIGHER_IS_BETTER.search(metric):
+        return 1
+    if "count" not in metric.lower() and LOWER_IS_BETTER.search(metric):
+        return -1
+    return 0
+
+
+def parse_value(text: str):
+    """Float value of a result cell, or None if it is empty or not a number."""
+    try:
+        return float(text)
+    except (TypeError, ValueError):
+        return None
+
+
+def read_csv_results(path: Path) -> list:
+    """``(lap, metric, task, value, unit)`` rows from a Rally CSV file."""
+    with open(path, newline="", encoding="utf-8") as f:
+        return [
+            (
+                row.get("Lap", ""),
+                row["Metric"],
+                row.get("Task") or "",
+                row["Value"],
+                row.get("Unit") or "",
+            )
+            for row in csv.DictReader(f)
+        ]
+
+
+def read_rep_results(path: Path) -> list:
+    """``(lap, metric, task, value, unit)`` rows from a Rally .rep report.
+
+    Only the markdown table is read; the banner, header and separator rows
+    are skipped.
+    """
+    rows = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line.startswith("|"):
+                continue
+            cells = [cell.strip() for cell in line.strip("|").split("|")]
+            if len(cells) != 5 or cells[1] == "Metric" or set(cells[0]) <= set("-:"):
+                continue
+            rows.append(tuple(cells))
+    return rows
+
+
+def read_results(path) -> dict:
+    """Map ``(lap, task, metric)`` to ``(value, unit)`` for one result file."""
+    path = Path(path)
+    if path.suffix == ".rep":
+        rows = read_rep_results(path)
+    else:
+        rows = read_csv_results(path)
+    results = {}
+    for lap, metric, task, value, unit in rows:
+        value = parse_value(value)
+        if value is not None:
+            results[(lap, task, metric)] = (value, unit)
+    return results
+
+
+def compare(
+    baseline: dict, contender: dict, threshold: float, min_delta: float = 0.0
+) -> list:
+    """Rows comparing two result sets on their shared ``(lap, task, metric)`` keys.
+
+    Each row is ``(lap, task, metric, base, value, diff, ratio, unit, regressed)``,
+    with ``ratio`` None when the baseline is zero. A row regressed if it moved
+    the wrong way by more than ``threshold`` relative to the baseline and by
+    more than ``min_delta`` in absolute terms. From a zero baseline, a
+    lower-is-better metric regressed if it grew by more than ``min_delta``.
+    """
+    rows = []
+    for key in baseline:
+        if key not in contender:
+            continue
+        lap, task, metric = key
+        base, unit = baseline[key]
+        value, _ = contender[key]
+        diff = value - base
+        direction = metric_direction(metric)
+        if base:
+            ratio = value / base
+            regressed = abs(diff) > min_delta and (
+                (direction > 0 and ratio - 1 < -threshold)
+                or (direction < 0 and ratio - 1 > threshold)
+            )
+        else:
+            # No relative change from zero (typical for error rate and
+            # throttle times), so any growth beyond min_delta counts
+            ratio = None
+            regressed = direction < 0 and diff > min_delta
+        rows.append((lap, task, metric, base, value, diff, ratio, unit, regressed))
+    return rows
+
+
+def print_comparison(name: str, baseline_name: str, rows: list) -> None:
+    """Print one baseline/contender comparison as an aligned table."""
+    print(f"\n{baseline_name} (baseline) vs {name}")
+    header = (
+        "Lap",
+        "Task",
+        "Metric",
+        "Baseline",
+        "Contender",
+        "Diff",
+        "Ratio",
+        "Unit",
+        "",
+    )
+    table = [header]
+    for lap, task, metric, base, value, diff, ratio, unit, regressed in rows:
+        table.append(
+            (
+                lap,
+                task,
+                metric,
+                f"{base:.6g}",
+                f"{value:.6g}",
+                f"{diff:+.6g}",
+                f"{ratio:.3f}" if ratio is not None else "-",
+                unit,
+                "REGRESSION" if regressed else "",
+            )
+        )
+    widths = [max(len(row[i]) for row in table) for i in range(len(header))]
+    for row in table:
+        print("  ".join(cell.ljust(width) for cell, width in zip(row, widths)).rstrip())
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Compare Rally-style benchmark results (CSV or .rep)"
+    )
+    parser.add_argument(
+        "files",
+        nargs="+",
+        help="Result files; the first is the baseline for all others",
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.1,
+        help="Relative change that counts as a regression (default: 0.1 = 10%%)",
+    )
+    parser.add_argument(
+        "--min-delta",
+        type=float,
+        default=0.0,
+        help="Absolute change (in the metric's unit) that must also be exceeded "
+        "(default: 0)",
+    )
+    parser.add_argument(
+        "--metric",
+        default=None,
+        help="Only compare metrics matching this regular expression",
+    )
+    parser.add_argument(
+        "--task",
+        default=None,
+        help="Only compare tasks matching this regular expression",
+    )
+    parser.add_argument(
+        "--regressions-only",
+        action="store_true",
+        help="Only print rows flagged as regressions",
+    )
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    if len(args.files) < 2:
+        print("Error: need a baseline and at least one file to compare")
+        return 2
+
+    try:
+        results = [read_results(path) for path in args.files]
+    except (OSError, KeyError, csv.Error) as e:
+        print(f"Error reading results: {e}")
+        return 2
+
+    metric_filter = re.compile(args.metric, re.IGNORECASE) if args.metric else None
+    task_filter = re.compile(args.task, re.IGNORECASE) if args.task else None
+
+    def selected(row):
+        task, metric = row[1], row[2]
+        if metric_filter and not metric_filter.search(metric):
+            return False
+        if task_filter and not task_filter.search(task):
+            return False
+        return True
+
+    baseline_name = Path(args.files[0]).name
+    regressions = 0
+    for path, contender in zip(args.files[1:], results[1:]):
+        rows = [
+            row
+            for row in compare(results[0], contender, args.threshold, args.min_delta)
+            if selected(row)
+        ]
+        flagged = sum(1 for row in rows if row[-1])
+        regressions += flagged
+        shown = [row for row in rows if row[-1]] if args.regressions_only else rows
+        print_comparison(Path(path).name, baseline_name, shown)
+        print(
+            f"{len(rows)} metrics compared, {flagged} regressed beyond {args.threshold:.0%}"
+        )
+
+    if regressions:
+        print(f"\n{regressions} regressions found")
+        return 1
+    print("\nNo regressions found")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,94 @@
+"""Tests for benchmarks/compare.py. Run with: python -m pytest benchmarks"""
+
+import compare
+
+LATENCY = ("All", "term", "90th percentile latency")
+THROUGHPUT = ("All", "term", "Median Throughput")
+GC_TIME = ("All", "", "Total Old Gen GC time")
+ERROR_RATE = ("All", "term", "error rate")
+
+
+def regressed(baseline, contender, **kwargs):
+    rows = compare.compare(baseline, contender, **kwargs)
+    return {(lap, task, metric): flag for lap, task, metric, *_, flag in rows}
+
+
+def test_zero_baseline_flags_growth_beyond_min_delta():
+    rows = compare.compare({GC_TIME: (0.0, "s")}, {GC_TIME: (0.087, "s")}, 0.1)
+    assert len(rows) == 1
+    _, _, _, base, value, diff, ratio, _, flag = rows[0]
+    assert (base, value, diff, ratio, flag) == (0.0, 0.087, 0.087, None, True)
+    assert not regressed(
+        {GC_TIME: (0.0, "s")}, {GC_TIME: (0.087, "s")}, threshold=0.1, min_delta=0.1
+    )[GC_TIME]
+
+
+def test_error_rate_from_zero_is_a_regression():
+    baseline = {ERROR_RATE: (0.0, "%"), THROUGHPUT: (0.0, "ops/s")}
+    contender = {ERROR_RATE: (100.0, "%"), THROUGHPUT: (50.0, "ops/s")}
+    flags = regressed(baseline, contender, threshold=0.1)
+    assert flags == {ERROR_RATE: True, THROUGHPUT: False}
+    unchanged = {ERROR_RATE: (0.0, "%"), THROUGHPUT: (0.0, "ops/s")}
+    assert not any(regressed(baseline, unchanged, threshold=0.1).values())
+
+
+def test_direction_and_threshold():
+    baseline = {LATENCY: (10.0, "ms"), THROUGHPUT: (100.0, "ops/s")}
+    worse = {LATENCY: (12.0, "ms"), THROUGHPUT: (80.0, "ops/s")}
+    better = {LATENCY: (8.0, "ms"), THROUGHPUT: (120.0, "ops/s")}
+    assert regressed(baseline, worse, threshold=0.1) == {
+        LATENCY: True,
+        THROUGHPUT: True,
+    }
+    assert not any(regressed(baseline, worse, threshold=0.25).values())
+    assert not any(regressed(baseline, better, threshold=0.1).values())
+
+
+def test_min_delta_ignores_small_absolute_changes():
+    baseline = {LATENCY: (0.01, "ms")}
+    contender = {LATENCY: (0.02, "ms")}
+    assert regressed(baseline, contender, threshold=0.1)[LATENCY]
+    assert not regressed(baseline, contender, threshold=0.1, min_delta=0.5)[LATENCY]
+
+
+def test_read_rep_and_csv(tmp_path):
+    rep = tmp_path / "run.rep"
+    rep.write_text(
+        "banner\n"
+        "|   Lap |                  Metric |   Task |   Value |   Unit |\n"
+        "|------:|------------------------:|-------:|--------:|-------:|\n"
+        "|   All | 90th percentile latency |   term |     3.5 |     ms |\n"
+        "|   All |              Store size |        |     1.2 |     GB |\n"
+    )
+    csv_file = tmp_path / "run.csv"
+    csv_file.write_text(
+        "Lap,Metric,Task,Value,Unit\n"
+        "All,90th percentile latency,term,3.5,ms\n"
+        "All,Store size,,1.2,GB\n"
+    )
+    expected = {LATENCY: (3.5, "ms"), ("All", "", "Store size"): (1.2, "GB")}
+    assert compare.read_results(rep) == expected
+    assert compare.read_results(csv_file) == expected
+
+
+def test_laps_are_compared_separately(tmp_path):
+    def report(name, latencies):
+        path = tmp_path / name
+        path.write_text(
+            "Lap,Metric,Task,Value,Unit\n"
+            + "".join(
+                f"{lap},90th percentile latency,term,{latency},ms\n"
+                for lap, latency in latencies
+            )
+        )
+        return compare.read_results(path)
+
+    baseline = report("base.csv", [("1", 5.0), ("2", 9.0), ("3", 40.0)])
+    contender = report("new.csv", [("1", 5.0), ("2", 20.0), ("3", 40.0)])
+    assert len(baseline) == 3
+    flags = regressed(baseline, contender, threshold=0.1)
+    assert [flags[(lap, "term", "90th percentile latency")] for lap in "123"] == [
+        False,
+        True,
+        False,
+    ]
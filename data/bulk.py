@@ -0,0 +1,332 @@
+"""
+Bulk request helpers shared by the data loaders.
+
+Documents are streamed from disk one at a time, batches are cut by payload
+size rather than document count, and the target size is tuned during the run
+from observed ``_bulk`` latency and rejections.
+"""
+
+import io
+import itertools
+import json
+import random
+import re
+import time
+
+DEFAULT_BATCH_BYTES = 5 * 1024 * 1024
+MIN_BATCH_BYTES = 256 * 1024
+MAX_BATCH_BYTES = 50 * 1024 * 1024
+
+READ_CHUNK_SIZE = 1024 * 1024
+_SEPARATORS = re.compile(r"[\s,]*")
+
+# Bulk item failures that mean "try again later" rather than "bad document"
+RETRYABLE_STATUSES = {429, 503}
+RETRYABLE_ERRORS = {"es_rejected_execution_exception"}
+
+# Index settings applied for the duration of a fast load (flat form)
+FAST_LOAD_SETTINGS = {
+    "index.refresh_interval": "-1",
+    "index.number_of_replicas": "0",
+}
+FAST_LOAD_TRANSLOG_SETTINGS = {
+    "index.translog.durability": "async",
+    "index.translog.flush_threshold_size": "1gb",
+}
+
+
+def iter_json_documents(path, chunk_size: int = READ_CHUNK_SIZE):
+    """Yield documents one at a time from a JSON array or NDJSON file.
+
+    Only the document being decoded is held in memory, so memory use does not
+    grow with the file and the first document is available right away.
+    """
+    decoder = json.JSONDecoder()
+    with open(path, encoding="utf-8") as f:
+        buf = f.read(chunk_size).lstrip()
+        if not buf.startswith("["):
+            # NDJSON: one document per line
+            for line in itertools.chain(io.StringIO(buf + f.readline()), f):
+                if line.strip():
+                    yield json.loads(line)
+            return
+
+        pos = 1
+        eof = False
+        while True:
+            pos = _SEPARATORS.match(buf, pos).end()
+            if pos < len(buf) and buf[pos] == "]":
+                return
+            try:
+                doc, end = decoder.raw_decode(buf, pos)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                # Document spans the chunk boundary: drop what was consumed and
+                # read at least as much again, so large documents stay linear.
+                buf = buf[pos:]
+                pos = 0
+                more = f.read(max(chunk_size, len(buf)))
+                eof = not more
+                buf += more
+                continue
+            yield doc
+            pos = end
+
+
+class CountingIterator:
+    """Wrap an iterable and count the items taken from it so far."""
+
+    def __init__(self, items):
+        self._items = iter(items)
+        self.count = 0
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        item = next(self._items)
+        self.count += 1
+        return item
+
+
+class AdaptiveBatchSizer:
+    """Tune the target bulk payload size from latency and 429 feedback.
+
+    Additive increase while requests finish under ``target_latency`` seconds,
+    multiplicative decrease when they run slow or the cluster rejects work.
+    """
+
+    def __init__(
+        self,
+        target_bytes: int = DEFAULT_BATCH_BYTES,
+        min_bytes: int = MIN_BATCH_BYTES,
+        max_bytes: int = MAX_BATCH_BYTES,
+        target_latency: float = 1.0,
+    ):
+        self.min_bytes = min_bytes
+        self.max_bytes = max(max_bytes, min_bytes)
+        self.target_bytes = min(max(target_bytes, min_bytes), self.max_bytes)
+        self.step = max(min_bytes, self.target_bytes // 10)
+        self.target_latency = target_latency
+
+    def record(self, num_bytes: int, latency: float, rejected: bool) -> None:
+        """Update the target size after a bulk request completes."""
+        if rejected:
+            self.target_bytes = max(self.min_bytes, self.target_bytes // 2)
+        elif latency > 2 * self.target_latency:
+            self.target_bytes = max(self.min_bytes, int(self.target_bytes * 0.75))
+        elif latency < self.target_latency and num_bytes >= self.target_bytes // 2:
+            # Only grow when the batch was actually near the target size,
+            # otherwise a short tail batch would inflate the estimate.
+            self.target_bytes = min(self.max_bytes, self.target_bytes + self.step)
+
+
+class BulkBuffer:
+    """Reusable byte buffer that accumulates NDJSON action/source lines.
+
+    Each pair is encoded once and written straight into the buffer, so
+    building a body is linear in its size and the buffer's memory is reused
+    from one batch to the next instead of growing a new string every time.
+    """
+
+    def __init__(self):
+        self._buf = io.BytesIO()
+
+    def __len__(self) -> int:
+        return self._buf.tell()
+
+    def add(self, action: dict, source) -> None:
+        """Append one action line and its source line.
+
+        ``source`` is a dict, or bytes that are already encoded JSON.
+        """
+        write = self._buf.write
+        write(json.dumps(action).encode("utf-8"))
+        write(b"\n")
+        if not isinstance(source, bytes):
+            source = json.dumps(source).encode("utf-8")
+        write(source)
+        write(b"\n")
+
+    def take(self) -> bytes:
+        """Return the accumulated body and reset the buffer for reuse."""
+        body = self._buf.getvalue()
+        self._buf.seek(0)
+        self._buf.truncate()
+        return body
+
+
+def iter_batches(items, to_pair, sizer: AdaptiveBatchSizer):
+    """Group items into bulk bodies of roughly ``sizer.target_bytes`` each.
+
+    ``to_pair`` turns one item into its ``(action, source)`` dicts. Yields
+    ``(items, body)`` tuples in input order. The target is re-read for every
+    batch, so feedback recorded while earlier batches are in flight shapes
+    the later ones.
+    """
+    buffer = BulkBuffer()
+    batch = []
+    for item in items:
+        buffer.add(*to_pair(item))
+        batch.append(item)
+        if len(buffer) >= sizer.target_bytes:
+            yield batch, buffer.take()
+            batch = []
+    if batch:
+        yield batch, buffer.take()
+
+
+def is_retryable(status: int, error=None) -> bool:
+    """Whether a failed bulk item (or request) is worth sending again."""
+    if status in RETRYABLE_STATUSES:
+        return True
+    error_type = error.get("type") if isinstance(error, dict) else None
+    return error_type in RETRYABLE_ERRORS
+
+
+def split_response(result: dict, batch: list) -> tuple:
+    """Split a bulk response into per-document outcomes.
+
+    ``batch`` holds the documents in the order they were sent, which is also
+    the order of ``result["items"]``. Returns ``(indexed, retry, failed)``:
+    the number of documents indexed, the documents rejected with a retryable
+    status, and ``(document, item)`` pairs for permanent failures.
+    """
+    if not result.get("errors"):
+        return len(batch), [], []
+    indexed = 0
+    retry = []
+    failed = []
+    for doc, item in zip(batch, result.get("items", [])):
+        outcome = next(iter(item.values()), {})
+        error = outcome.get("error")
+        if not error:
+            indexed += 1
+        elif is_retryable(outcome.get("status", 0), error):
+            retry.append(doc)
+        else:
+            failed.append((doc, outcome))
+    return indexed, retry, failed
+
+
+def count_rejections(result: dict) -> int:
+    """Count items a bulk response rejected with a retryable status."""
+    if not result.get("errors"):
+        return 0
+    rejected = 0
+    for item in result.get("items", []):
+        outcome = next(iter(item.values()), {})
+        if outcome.get("error") and is_retryable(
+            outcome.get("status", 0), outcome["error"]
+        ):
+            rejected += 1
+    return rejected
+
+
+def backoff_delay(attempt: int, base: float = 0.5, cap: float = 30.0) -> float:
+    """Exponential backoff with jitter for the given retry attempt (0-based)."""
+    return random.uniform(0.5, 1.0) * min(cap, base * 2**attempt)
+
+
+def fast_load_settings(translog: bool = False) -> dict:
+    """Flat index settings that speed up a bulk load.
+
+    Refreshes and replica writes are turned off; with ``translog`` the
+    translog is also fsynced asynchronously and flushed less often, which
+    trades durability of the last few seconds for throughput.
+    """
+    settings = dict(FAST_LOAD_SETTINGS)
+    if translog:
+        settings.update(FAST_LOAD_TRANSLOG_SETTINGS)
+    return settings
+
+
+def settings_to_restore(current: dict, applied: dict) -> dict:
+    """Flat settings that undo ``applied`` given the ``current`` flat settings.
+
+    Keys that were not set on the index map to None, which resets them to
+    the cluster default.
+    """
+    return {key: current.get(key) for key in applied}
+
+
+def expected_health(data_nodes: int) -> str:
+    """Best status an index with replicas can reach on ``data_nodes`` nodes.
+
+    A replica is never allocated next to its primary, so on a single-node
+    cluster an index with replicas stays yellow.
+    """
+    return "green" if data_nodes > 1 else "yellow"
+
+
+def versioned_index_name(alias: str) -> str:
+    """Name for a new version of the index behind ``alias``."""
+    return f"{alias}-{time.strftime('%Y%m%d%H%M%S', time.gmtime())}"
+
+
+def index_versions(alias: str, indices) -> list:
+    """The versioned indices of ``alias`` among ``indices``, oldest first."""
+    pattern = re.compile(re.escape(alias) + r"-\d{14}")
+    return sorted(name for name in indices if pattern.fullmatch(name))
+
+
+def alias_swap_actions(alias: str, new_index: str, current, legacy_index=False):
+    """``_aliases`` actions that point ``alias`` at ``new_index`` atomically.
+
+    ``current`` lists the indices that hold the alias now. With
+    ``legacy_index`` a concrete index named like the alias (from a load
+    without alias swapping) is deleted in the same request, since an alias
+    cannot be added while it exists.
+    """
+    actions = [{"remove": {"index": index, "alias": alias}} for index in current]
+    if legacy_index:
+        actions.append({"remove_index": {"index": alias}})
+    actions.append({"add": {"index": new_index, "alias": alias}})
+    return actions
+
+
+def stale_versions(alias: str, indices, live: str, keep: int = 1, previous=()) -> list:
+    """Versioned indices of ``alias`` that can be deleted.
+
+    The live index is always kept, plus ``keep`` older versions for a quick
+    rollback: first the ones the alias pointed to before the swap
+    (``previous``), then the newest of the rest. A newer leftover from an
+    aborted load therefore never takes the place of the last good version.
+    """
+    older = [name for name in index_versions(alias, indices) if name < live]
+    newest_first = older[::-1]
+    kept = [name for name in newest_first if name in previous][:keep]
+    kept += [name for name in newest_first if name not in kept][: keep - len(kept)]
+    return [name for name in older if name not in kept]
+
+
+class DeadLetterFile:
+    """Append permanently failed documents to an NDJSON file.
+
+    The file is only created once the first failure is written, so a clean
+    load leaves nothing behind.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.count = 0
+        self._file = None
+
+    def write(self, doc: dict, status, error) -> None:
+        if self._file is None:
+            self._file = open(self.path, "a", encoding="utf-8")
+        record = {"status": status, "error": error, "document": doc}
+        self._file.write(json.dumps(record) + "\n")
+        self.count += 1
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
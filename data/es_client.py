@@ -0,0 +1,87 @@
+"""
+Pooled HTTP client shared by the data loaders and validate.py.
+
+One ``ClusterClient`` per cluster holds a ``requests.Session`` whose
+connection pool is reused across calls, so repeated health checks, index
+operations, bulk requests and searches skip TCP (and TLS) setup.
+"""
+
+import sys
+
+try:
+    import requests
+    from requests.adapters import HTTPAdapter
+except ImportError:
+    print("Error: requests library required. Install with: pip install requests")
+    sys.exit(1)
+
+DEFAULT_POOL_SIZE = 10
+DEFAULT_TIMEOUT = 10
+
+
+class ClusterClient:
+    """HTTP client for one Elasticsearch/OpenSearch cluster.
+
+    ``pool_size`` caps the connections kept open for reuse; size it to at
+    least the number of threads sharing the client. With ``keep_alive``
+    off every request asks the server to close the connection, which
+    matches the old one-connection-per-call behaviour.
+    """
+
+    def __init__(
+        self,
+        base_url: str,
+        auth: tuple = None,
+        verify_ssl: bool = True,
+        pool_size: int = DEFAULT_POOL_SIZE,
+        keep_alive: bool = True,
+        timeout: float = DEFAULT_TIMEOUT,
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.pool_size = max(1, pool_size)
+        self.keep_alive = keep_alive
+        self.timeout = timeout
+
+        self.session = requests.Session()
+        self.session.auth = auth
+        self.session.verify = verify_ssl
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        if not keep_alive:
+            self.session.headers["Connection"] = "close"
+
+    def url(self, path: str = "") -> str:
+        """Absolute URL for ``path``; full URLs are passed through."""
+        if "://" in path:
+            return path
+        return f"{self.base_url}/{path.lstrip('/')}" if path else self.base_url
+
+    def request(self, method: str, path: str = "", **kwargs) -> requests.Response:
+        """Send a request over the pooled session."""
+        kwargs.setdefault("timeout", self.timeout)
+        return self.session.request(method, self.url(path), **kwargs)
+
+    def get(self, path: str = "", **kwargs) -> requests.Response:
+        return self.request("GET", path, **kwargs)
+
+    def put(self, path: str = "", **kwargs) -> requests.Response:
+        return self.request("PUT", path, **kwargs)
+
+    def post(self, path: str = "", **kwargs) -> requests.Response:
+        return self.request("POST", path, **kwargs)
+
+    def delete(self, path: str = "", **kwargs) -> requests.Response:
+        return self.request("DELETE", path, **kwargs)
+
+    def head(self, path: str = "", **kwargs) -> requests.Response:
+        return self.request("HEAD", path, **kwargs)
+
+    def close(self) -> None:
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
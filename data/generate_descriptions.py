@@ -6,7 +6,21 @@ Reads ml-32m/movies.csv (movieId, title, genres) and produces
 data/movies_enriched.csv with 6 extra columns:
   abstract_en, abstract_kk, abstract_fr, description_en, description_kk, description_fr
 
-Supports resuming from where it left off if interrupted.
+Requests run through a fixed pool of --concurrency workers that each pick up
+the next movie as soon as their previous one finishes, so one slow request
+never holds the rest back. A shared rate controller honours Retry-After and
+rate-limit reset headers, halves the in-flight limit on 429s and grows it back
+gradually, and optionally enforces --max-rps / --max-tpm.
+
+With --movies-per-request N, each prompt carries N movies and asks for a JSON
+array keyed by movieId, so the system prompt and request overhead are paid
+once per N movies. Each entry is validated on its own and only movies missing
+from the reply fall back to single requests.
+
+Supports resuming from where it left off if interrupted: completed movies are
+appended (and fsynced every --batch-size movies) to <output>.journal.ndjson,
+which is replayed on the next run. The ordered output CSV is written once at
+the end.
 
 Usage:
     export OPENROUTER_API_KEY="sk-or-..."
@@ -18,7 +32,16 @@ Options:
     --model         OpenRouter model ID   (default: google/gemini-2.0-flash-001)
     --concurrency   Parallel requests     (default: 20)
     --limit         Max movies to process (default: all)
-    --batch-size    Save every N movies   (default: 100)
+    --batch-size    Checkpoint every N    (default: 100)
+    --max-rps       Requests/s cap        (default: unlimited)
+    --max-tpm       Tokens/minute cap     (default: unlimited)
+    --movies-per-request  Movies per prompt (default: 1, max: 10)
+    --endpoint      Chat completions URL  (default: $LLM_ENDPOINT or OpenRouter)
+
+Any OpenAI-compatible chat completions endpoint works. To benchmark or test
+offline, start the bundled mock (no API key needed for a non-default endpoint):
+    python data/mock_llm_server.py --port 8099 --rate-limit 0.05 &
+    python data/generate_descriptions.py --endpoint http://127.0.0.1:8099/v1/chat/completions
 """
 
 import argparse
@@ -26,8 +49,10 @@ import asyncio
 import csv
 import json
 import os
+import re
 import sys
 import time
+from email.utils import parsedate_to_datetime
 from pathlib import Path
 
 try:
@@ -39,6 +64,19 @@ except ImportError:
 
 OPENROUTER_URL = "https://openrouter.ai/api/v1/chat/completions"
 
+# Responses that mean "slow down" rather than "this request failed"
+RATE_LIMIT_STATUSES = {429, 503}
+MAX_RATE_LIMITED = 10
+
+# Completion budget per movie, and the most one request may ask for; larger
+# max_tokens values are rejected outright by many providers
+TOKENS_PER_MOVIE = 1536
+MAX_OUTPUT_TOKENS = 16384
+MAX_MOVIES_PER_REQUEST = MAX_OUTPUT_TOKENS // TOKENS_PER_MOVIE
+
+DURATION_PART = re.compile(r"([\d.]+)(ms|s|m|h)")
+DURATION_UNITS = {"ms": 0.001, "s": 1, "m": 60, "h": 3600}
+
 FIELDS = [
     "abstract_en",
     "abstract_kk",
@@ -66,6 +104,26 @@ Respond ONLY with valid JSON containing exactly these 6 keys:
 "description_en": "...", "description_kk": "...", "description_fr": "..."}
 No markdown, no code fences, no extra text."""
 
+BATCH_SYSTEM_PROMPT = """\
+You are a movie encyclopedia. You will be given several movies, each with a \
+movieId, a title and its genres. For every movie, generate an abstract and \
+description in three languages: English, Kazakh, and French.
+
+For each language produce:
+- "abstract_XX": 1-2 concise sentences describing what the movie is about.
+- "description_XX": A detailed one-paragraph description (~100-150 words) covering \
+the plot, themes, and notable aspects of the movie.
+
+Language codes: en = English, kk = Kazakh (use Cyrillic script), fr = French.
+
+If you don't recognize a movie, write plausible descriptions based on the title and genres.
+
+Respond ONLY with a valid JSON array containing one object per movie, in the order \
+given, each with exactly these 7 keys:
+[{"movieId": "...", "abstract_en": "...", "abstract_kk": "...", "abstract_fr": "...", \
+"description_en": "...", "description_kk": "...", "description_fr": "..."}]
+Copy each movieId exactly as given. No markdown, no code fences, no extra text."""
+
 
 def parse_args():
     parser = argparse.ArgumentParser(description="Generate movie descriptions via LLM")
@@ -100,7 +158,32 @@ def parse_args():
         "--batch-size",
         type=int,
         default=100,
-        help="Save progress every N movies (default: 100)",
+        help="Checkpoint progress every N completed movies (default: 100)",
+    )
+    parser.add_argument(
+        "--max-rps",
+        type=float,
+        default=0,
+        help="Cap on requests per second, 0=unlimited (default: 0)",
+    )
+    parser.add_argument(
+        "--max-tpm",
+        type=int,
+        default=0,
+        help="Cap on LLM tokens per minute, 0=unlimited (default: 0)",
+    )
+    parser.add_argument(
+        "--endpoint",
+        default=os.environ.get("LLM_ENDPOINT", OPENROUTER_URL),
+        help="OpenAI-compatible chat completions URL "
+        "(default: $LLM_ENDPOINT or OpenRouter)",
+    )
+    parser.add_argument(
+        "--movies-per-request",
+        type=int,
+        default=1,
+        help="Pack N movies into each prompt, retrying gaps singly "
+        f"(default: 1, max: {MAX_MOVIES_PER_REQUEST})",
     )
     return parser.parse_args()
 
@@ -115,58 +198,328 @@ def read_input(path):
     return movies
 
 
+def journal_path(output):
+    """Append-only progress journal that sits next to the output CSV."""
+    return f"{output}.journal.ndjson"
+
+
 def read_existing_output(path):
-    """Read already-processed movie IDs from output CSV for resume support."""
+    """Read already-processed movies for resume support.
+
+    Rows come from the output CSV of an earlier run plus the journal of an
+    interrupted one; journal entries win since they are newer.
+    """
     done = {}
-    if not Path(path).exists():
-        return done
-    with open(path, newline="", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            done[row["movieId"]] = row
+    if Path(path).exists():
+        with open(path, newline="", encoding="utf-8") as f:
+            reader = csv.DictReader(f)
+            for row in reader:
+                done[row["movieId"]] = row
+    journal = Path(journal_path(path))
+    if journal.exists():
+        with open(journal, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    row = json.loads(line)
+                except json.JSONDecodeError:
+                    break  # torn last line from an interrupted write
+                done[row["movieId"]] = row
     return done
 
 
+def open_journal(path):
+    """Open the journal for appending, dropping a torn final line if any."""
+    journal = open(path, "ab+")
+    size = journal.seek(0, os.SEEK_END)
+    if size:
+        journal.seek(max(0, size - 65536))
+        tail = journal.read()
+        if not tail.endswith(b"\n"):
+            journal.truncate(size - len(tail) + tail.rfind(b"\n") + 1)
+    return journal
+
+
+def append_journal(journal, rows):
+    """Append rows to the journal and fsync, so a finished batch survives a crash."""
+    for row in rows:
+        journal.write(json.dumps(row, ensure_ascii=False).encode("utf-8") + b"\n")
+    journal.flush()
+    os.fsync(journal.fileno())
+
+
 def write_output(path, rows):
     """Write all rows to the output CSV."""
     if not rows:
         return
     fieldnames = ["movieId", "title", "genres"] + FIELDS
-    with open(path, "w", newline="", encoding="utf-8") as f:
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", newline="", encoding="utf-8") as f:
         writer = csv.DictWriter(f, fieldnames=fieldnames)
         writer.writeheader()
         writer.writerows(rows)
+    os.replace(tmp, path)
 
 
-def parse_llm_response(text):
-    """Parse JSON from LLM response, handling common formatting issues."""
+def finalize_output(path, all_movies, results):
+    """Write the final CSV once, in input order, then retire the journal."""
+    ordered = [results[m["movieId"]] for m in all_movies if m["movieId"] in results]
+    write_output(path, ordered)
+    Path(journal_path(path)).unlink(missing_ok=True)
+
+
+def strip_code_fences(text):
+    """Strip surrounding whitespace and markdown code fences from a reply."""
     text = text.strip()
-    # Strip markdown code fences if present
     if text.startswith("```"):
         text = text.split("\n", 1)[-1]
         if text.endswith("```"):
             text = text[: -len("```")]
         text = text.strip()
+    return text
+
+
+def parse_llm_response(text):
+    """Parse JSON from LLM response, handling common formatting issues."""
     try:
-        data = json.loads(text)
+        data = json.loads(strip_code_fences(text))
         result = {f: data.get(f, "") for f in FIELDS}
         if all(result.values()):
             return result
         return None
-    except json.JSONDecodeError:
+    except (json.JSONDecodeError, AttributeError):
         return None
 
 
-async def call_llm(session, semaphore, movie, model, api_key, retries=3):
-    """Call OpenRouter API for a single movie."""
-    title = movie["title"]
-    genres = movie.get("genres", "").replace("|", ", ")
-    user_msg = f"Title: {title}\nGenres: {genres}"
+def parse_batch_response(text):
+    """Parse a multi-movie reply into ``{movieId: result}``.
 
+    Entries that are missing, malformed or have an empty field are left out,
+    so the caller can fall back to single requests for just those movies.
+    """
+    try:
+        data = json.loads(strip_code_fences(text))
+    except json.JSONDecodeError:
+        return {}
+    if isinstance(data, dict):
+        data = data.get("movies", [])
+    results = {}
+    for item in data if isinstance(data, list) else []:
+        if not isinstance(item, dict) or "movieId" not in item:
+            continue
+        result = {f: item.get(f, "") for f in FIELDS}
+        if all(isinstance(v, str) and v for v in result.values()):
+            results[str(item["movieId"])] = result
+    return results
+
+
+def parse_retry_after(headers):
+    """Seconds to wait according to rate-limit response headers, or None.
+
+    Understands ``Retry-After`` (seconds or HTTP date), ``retry-after-ms``,
+    OpenAI-style ``x-ratelimit-reset-*`` durations ("1s", "6m0s", "20ms")
+    and OpenRouter's ``X-RateLimit-Reset`` epoch timestamp (in ms).
+    """
+    value = headers.get("retry-after-ms")
+    if value:
+        try:
+            return float(value) / 1000
+        except ValueError:
+            pass
+    value = headers.get("Retry-After")
+    if value:
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            try:
+                when = parsedate_to_datetime(value)
+                return max(0.0, when.timestamp() - time.time())
+            except (TypeError, ValueError):
+                pass
+    delays = []
+    for name in ("x-ratelimit-reset-requests", "x-ratelimit-reset-tokens"):
+        value = headers.get(name)
+        if value:
+            parts = DURATION_PART.findall(value)
+            if parts:
+                delays.append(sum(float(n) * DURATION_UNITS[u] for n, u in parts))
+    if delays:
+        return max(delays)
+    value = headers.get("x-ratelimit-reset")
+    if value:
+        try:
+            reset = float(value)
+        except ValueError:
+            return None
+        if reset > 1e12:  # milliseconds since the epoch
+            reset /= 1000
+        return max(0.0, reset - time.time())
+    return None
+
+
+class RateController:
+    """Shared adaptive limiter that every request consults before sending.
+
+    Concurrency follows AIMD: each success raises the in-flight limit by
+    ``1 / limit`` (about +1 per round of requests) up to ``max_concurrency``,
+    and a rate-limit response halves it, at most once per second. A 429 also
+    pauses all requests until the provider's ``Retry-After`` / reset time.
+    Optional token buckets cap requests per second and LLM tokens per minute;
+    a request is charged the running average token usage up front and
+    corrected with the real ``usage.total_tokens`` when it completes.
+    """
+
+    def __init__(self, max_concurrency, requests_per_second=0, tokens_per_minute=0):
+        self.max_concurrency = max_concurrency
+        self.limit = float(max_concurrency)
+        self.rps = requests_per_second
+        self.tpm = tokens_per_minute
+        self.in_flight = 0
+        self.rate_limited = 0
+        self.paused_until = 0.0
+        self.avg_tokens = 1000.0
+        self._request_budget = max(1.0, requests_per_second)
+        self._token_budget = float(tokens_per_minute)
+        self._refilled = time.monotonic()
+        self._last_decrease = 0.0
+        self._cond = asyncio.Condition()
+
+    def _refill(self, now):
+        elapsed = now - self._refilled
+        self._refilled = now
+        if self.rps:
+            self._request_budget = min(
+                max(1.0, self.rps), self._request_budget + elapsed * self.rps
+            )
+        if self.tpm:
+            self._token_budget = min(
+                self.tpm, self._token_budget + elapsed * self.tpm / 60
+            )
+
+    def _delay(self, now):
+        """Seconds until the pause and both token buckets allow a request."""
+        delay = self.paused_until - now
+        if self.rps and self._request_budget < 1:
+            delay = max(delay, (1 - self._request_budget) / self.rps)
+        if self.tpm and self._token_budget < self.avg_tokens:
+            needed = min(self.avg_tokens, self.tpm) - self._token_budget
+            delay = max(delay, needed * 60 / self.tpm)
+        return max(0.0, delay)
+
+    async def acquire(self):
+        """Wait for a request slot; returns the tokens charged for it."""
+        async with self._cond:
+            while True:
+                now = time.monotonic()
+                self._refill(now)
+                delay = self._delay(now)
+                if not delay and self.in_flight < int(self.limit):
+                    break
+                try:
+                    await asyncio.wait_for(self._cond.wait(), delay or None)
+                except asyncio.TimeoutError:
+                    pass
+            self.in_flight += 1
+            self._request_budget -= 1
+            charged = self.avg_tokens if self.tpm else 0.0
+            self._token_budget -= charged
+            return charged
+
+    async def release(self):
+        async with self._cond:
+            self.in_flight -= 1
+            self._cond.notify_all()
+
+    def on_success(self, charged, tokens=None):
+        self.limit = min(self.max_concurrency, self.limit + 1 / self.limit)
+        if tokens:
+            self.avg_tokens = 0.9 * self.avg_tokens + 0.1 * tokens
+            if self.tpm:
+                self._token_budget += charged - tokens
+
+    def on_rate_limited(self, headers):
+        self.rate_limited += 1
+        now = time.monotonic()
+        if now - self._last_decrease >= 1:
+            self.limit = max(1.0, self.limit / 2)
+            self._last_decrease = now
+        delay = parse_retry_after(headers)
+        if delay is None:
+            delay = min(60.0, 2.0 ** min(self.rate_limited, 6))
+        self.paused_until = max(self.paused_until, now + min(delay, 300))
+
+
+async def request_completion(
+    session,
+    controller,
+    endpoint,
+    payload,
+    api_key,
+    label,
+    parse,
+    retries=3,
+    timeout=30,
+):
+    """Send a chat completion until ``parse`` accepts the reply.
+
+    ``parse(content)`` returns a falsy value to retry. Rate-limit responses
+    do not use up ``retries``; they feed the shared controller, which slows
+    every request down, and the call tries again. Malformed replies (bad
+    JSON, missing choices) count as a failed attempt. Returns None on failure.
+    """
     headers = {
         "Authorization": f"Bearer {api_key}",
         "Content-Type": "application/json",
     }
+    attempt = 0
+    rate_limited = 0
+    while attempt < retries and rate_limited < MAX_RATE_LIMITED:
+        charged = await controller.acquire()
+        delay = 0
+        try:
+            async with session.post(
+                endpoint, headers=headers, json=payload, timeout=timeout
+            ) as resp:
+                if resp.status in RATE_LIMIT_STATUSES:
+                    rate_limited += 1
+                    controller.on_rate_limited(resp.headers)
+                    continue
+                resp_data = await resp.json()
+                if resp.status != 200:
+                    err = resp_data.get("error", {}).get("message", resp.status)
+                    print(f"  API error for {label}: {err}")
+                    attempt += 1
+                    delay = 1
+                else:
+                    tokens = resp_data.get("usage", {}).get("total_tokens")
+                    controller.on_success(charged, tokens)
+                    content = resp_data["choices"][0]["message"]["content"]
+                    result = parse(content)
+                    if result:
+                        return result
+                    attempt += 1
+        except (ValueError, KeyError, IndexError, TypeError, AttributeError) as e:
+            attempt += 1
+            if attempt >= retries:
+                print(f"  Malformed response for {label}: {e!r}")
+        except (asyncio.TimeoutError, aiohttp.ClientError) as e:
+            attempt += 1
+            if attempt < retries:
+                delay = 2**attempt
+            else:
+                print(f"  Failed after {retries} attempts for {label}: {e}")
+        finally:
+            await controller.release()
+        if delay:
+            await asyncio.sleep(delay)
+    return None
+
+
+async def call_llm(session, controller, endpoint, movie, model, api_key, retries=3):
+    """Call OpenRouter API for a single movie."""
+    title = movie["title"]
+    genres = movie.get("genres", "").replace("|", ", ")
+    user_msg = f"Title: {title}\nGenres: {genres}"
+
     payload = {
         "model": model,
         "messages": [
@@ -174,54 +527,133 @@ async def call_llm(session, semaphore, movie, model, api_key, retries=3):
             {"role": "user", "content": user_msg},
         ],
         "temperature": 0.3,
-        "max_tokens": 1536,
+        "max_tokens": TOKENS_PER_MOVIE,
     }
+    result = await request_completion(
+        session,
+        controller,
+        endpoint,
+        payload,
+        api_key,
+        f"'{title}'",
+        parse_llm_response,
+        retries,
+    )
+    return result or {f: "" for f in FIELDS}
 
-    for attempt in range(retries):
-        async with semaphore:
-            try:
-                async with session.post(
-                    OPENROUTER_URL, headers=headers, json=payload, timeout=30
-                ) as resp:
-                    if resp.status == 429:
-                        wait = 2 ** (attempt + 1)
-                        await asyncio.sleep(wait)
-                        continue
-                    resp_data = await resp.json()
-                    if resp.status != 200:
-                        err = resp_data.get("error", {}).get("message", resp.status)
-                        print(f"  API error for '{title}': {err}")
-                        await asyncio.sleep(1)
-                        continue
-                    content = resp_data["choices"][0]["message"]["content"]
-                    result = parse_llm_response(content)
-                    if result:
-                        return result
-                    continue
-            except (asyncio.TimeoutError, aiohttp.ClientError) as e:
-                if attempt < retries - 1:
-                    await asyncio.sleep(2 ** (attempt + 1))
-                else:
-                    print(f"  Failed after {retries} attempts for '{title}': {e}")
 
-    return {f: "" for f in FIELDS}
+async def call_llm_batch(
+    session, controller, endpoint, movies, model, api_key, retries=3
+):
+    """Call OpenRouter API once for several movies.
+
+    Returns ``{movieId: result}`` for the movies the reply covered in full;
+    the caller handles the rest.
+    """
+    user_msg = "\n\n".join(
+        f"movieId: {m['movieId']}\nTitle: {m['title']}\n"
+        f"Genres: {m.get('genres', '').replace('|', ', ')}"
+        for m in movies
+    )
+    payload = {
+        "model": model,
+        "messages": [
+            {"role": "system", "content": BATCH_SYSTEM_PROMPT},
+            {"role": "user", "content": user_msg},
+        ],
+        "temperature": 0.3,
+        "max_tokens": min(TOKENS_PER_MOVIE * len(movies), MAX_OUTPUT_TOKENS),
+    }
+    label = f"{len(movies)} movies from '{movies[0]['title']}'"
+    result = await request_completion(
+        session,
+        controller,
+        endpoint,
+        payload,
+        api_key,
+        label,
+        parse_batch_response,
+        retries,
+        timeout=30 * len(movies),
+    )
+    return result or {}
 
 
-async def process_batch(movies, model, api_key, concurrency):
-    """Process a batch of movies concurrently."""
-    semaphore = asyncio.Semaphore(concurrency)
-    async with aiohttp.ClientSession() as session:
-        tasks = [call_llm(session, semaphore, m, model, api_key) for m in movies]
-        return await asyncio.gather(*tasks)
+def create_session(concurrency):
+    """Create the one HTTP session shared by every request and retry of a run.
+
+    The pool holds one keep-alive connection per worker, so TLS handshakes
+    are paid once per connection rather than once per request, and DNS
+    lookups are cached for the run.
+    """
+    connector = aiohttp.TCPConnector(
+        limit=concurrency,
+        limit_per_host=concurrency,
+        keepalive_timeout=60,
+        ttl_dns_cache=300,
+    )
+    return aiohttp.ClientSession(connector=connector)
+
+
+async def process_movies(
+    session,
+    controller,
+    endpoint,
+    movies,
+    model,
+    api_key,
+    on_result,
+    movies_per_request=1,
+):
+    """Enrich movies with a fixed pool of workers over the whole input.
+
+    One worker per allowed concurrent request takes the next movie (or the
+    next ``movies_per_request`` movies, packed into one prompt) as soon as
+    its previous request finishes, so the controller's in-flight limit is
+    kept full until the queue drains instead of waiting on the slowest
+    request of a batch. Movies a packed reply left out are retried as single
+    requests. ``on_result(movie, result)`` is called as each movie completes.
+    """
+    queue = asyncio.Queue()
+    for movie in movies:
+        queue.put_nowait(movie)
+
+    async def worker():
+        while not queue.empty():
+            take = min(movies_per_request, queue.qsize())
+            group = [queue.get_nowait() for _ in range(take)]
+            results = {}
+            if len(group) > 1:
+                results = await call_llm_batch(
+                    session, controller, endpoint, group, model, api_key
+                )
+            for movie in group:
+                result = results.get(movie["movieId"])
+                if result is None:
+                    result = await call_llm(
+                        session, controller, endpoint, movie, model, api_key
+                    )
+                on_result(movie, result)
+
+    workers = min(controller.max_concurrency, len(movies))
+    await asyncio.gather(*(worker() for _ in range(workers)))
 
 
 async def main():
     args = parse_args()
 
     api_key = os.environ.get("OPENROUTER_API_KEY", "")
-    if not api_key:
+    if not api_key and args.endpoint == OPENROUTER_URL:
         print("Error: Set OPENROUTER_API_KEY environment variable")
         sys.exit(1)
+    if not 1 <= args.movies_per_request <= MAX_MOVIES_PER_REQUEST:
+        print(
+            f"Error: --movies-per-request must be between 1 and "
+            f"{MAX_MOVIES_PER_REQUEST} ({MAX_OUTPUT_TOKENS} output tokens per request)"
+        )
+        sys.exit(1)
+    if args.endpoint != OPENROUTER_URL:
+        print(f"Using endpoint {args.endpoint}")
 
     # Read input
     print(f"Reading {args.input}...")
@@ -240,52 +672,71 @@ async def main():
     print(f"  To process: {len(remaining)}")
 
     if not remaining:
+        if Path(journal_path(args.output)).exists():
+            finalize_output(args.output, all_movies, done)
         print("Nothing to do!")
         return
 
     # Collect all results (start with existing)
     all_results = {mid: row for mid, row in done.items()}
 
-    # Process in batches
+    # Keep --concurrency requests in flight; checkpoint every --batch-size
     total = len(remaining)
     start_time = time.time()
     processed = 0
+    failed = 0
+    pending = []
+    journal = open_journal(journal_path(args.output))
+
+    def on_result(movie, result):
+        nonlocal processed, failed
+        row = {
+            "movieId": movie["movieId"],
+            "title": movie["title"],
+            "genres": movie.get("genres", ""),
+        }
+        row.update(result)
+        all_results[movie["movieId"]] = row
+        pending.append(row)
+        processed += 1
+        if not row.get("abstract_en"):
+            failed += 1
+        if len(pending) < args.batch_size and processed < total:
+            return
+
+        append_journal(journal, pending)
+        pending.clear()
 
-    for i in range(0, total, args.batch_size):
-        batch = remaining[i : i + args.batch_size]
-        results = await process_batch(batch, args.model, api_key, args.concurrency)
-
-        for movie, result in zip(batch, results):
-            row = {
-                "movieId": movie["movieId"],
-                "title": movie["title"],
-                "genres": movie.get("genres", ""),
-            }
-            row.update(result)
-            all_results[movie["movieId"]] = row
-
-        processed += len(batch)
         elapsed = time.time() - start_time
         rate = processed / elapsed if elapsed > 0 else 0
         eta = (total - processed) / rate if rate > 0 else 0
         pct = processed / total * 100
-
-        failed = sum(
-            1 for m in batch if not all_results[m["movieId"]].get("abstract_en")
-        )
-
         print(
             f"  [{processed}/{total}] {pct:.0f}% | "
             f"{rate:.1f} movies/s | ETA {eta:.0f}s | "
-            f"batch failures: {failed}"
+            f"failures: {failed}"
+        )
+
+    controller = RateController(args.concurrency, args.max_rps, args.max_tpm)
+    async with create_session(args.concurrency) as session:
+        await process_movies(
+            session,
+            controller,
+            args.endpoint,
+            remaining,
+            args.model,
+            api_key,
+            on_result,
+            args.movies_per_request,
+        )
+    if controller.rate_limited:
+        print(
+            f"  Rate limited {controller.rate_limited} times, "
+            f"final concurrency {int(controller.limit)}"
         )
 
-        # Save progress — preserve input order
-        ordered = []
-        for m in all_movies:
-            if m["movieId"] in all_results:
-                ordered.append(all_results[m["movieId"]])
-        write_output(args.output, ordered)
+    journal.close()
+    finalize_output(args.output, all_movies, all_results)
 
     elapsed = time.time() - start_time
     total_done = sum(1 for r in all_results.values() if r.get("abstract_en"))
@@ -5,6 +5,12 @@ Generate embeddings for multilingual movie text fields using EmbeddingGemma-300M
 Reads data/movies_enriched.csv and produces data/movies_enriched_with_embeddings.json
 with 768-dim embeddings for each of the 6 text fields.
 
+With --format binary the JSON output keeps only the text fields, and the
+embeddings go to a sidecar directory next to it (<output>.vectors/):
+    index.json     {"model", "dim", "dtype": "<f4", "count", "fields", "ids"}
+    <field>.f32    row-major little-endian float32 matrix, one row per id
+data/index.py memory-maps these files instead of parsing JSON float lists.
+
 Requires:
     pip install sentence-transformers
     export HF_TOKEN="hf_..."  (must accept license at huggingface.co/google/embeddinggemma-300m)
@@ -16,15 +22,46 @@ Options:
     --input       Input CSV path   (default: data/movies_enriched.csv)
     --output      Output JSON path (default: data/movies_enriched_with_embeddings.json)
     --batch-size  Encoding batch   (default: 64)
+    --format      json or binary   (default: json)
+    --cache       Embedding cache  (default: data/.embedding_cache.sqlite)
+    --cache-max-mb  Cache size cap (default: 2048)
+    --no-cache    Encode everything from scratch
+    --workers     CPU worker processes, each with its own model (default: 1)
+    --threads-per-worker  Torch threads per worker (default: cores / workers)
+    --chunk-size  Movies per checkpoint (default: 2000)
+
+All six text fields are encoded in one pass: texts are sorted into length
+buckets and each bucket is encoded with a batch size scaled to its length,
+so short abstracts and long descriptions are not padded against each other.
+
+With --workers N > 1, each bucket is split into shards that a pool of N
+processes encodes on CPU, each with its own model copy and a fixed torch
+thread count. Shards are gathered back in order.
+
+Output is written chunk by chunk, so memory stays bounded by --chunk-size.
+After every chunk <output>.checkpoint records the completed rows; re-running
+the same command after an interruption resumes from the last chunk.
+
+Embeddings are cached on disk by (model, field, SHA-256 of text), so a re-run
+only encodes texts that are new or changed. Identical texts, such as the
+empty strings of movies without a description, are encoded once.
 """
 
 import argparse
 import csv
+import hashlib
 import json
+import multiprocessing
+import os
+import sqlite3
 import sys
 import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice, repeat
+from pathlib import Path
 
 try:
+    import numpy as np
     from sentence_transformers import SentenceTransformer
 except ImportError:
     print(
@@ -44,6 +81,14 @@ TEXT_FIELDS = [
 
 CSV_FIELDS = ["movieId", "title", "genres"] + TEXT_FIELDS
 
+MODEL_NAME = "google/embeddinggemma-300m"
+
+# Length bucketing: a ~150-word description (about 1024 chars) is encoded
+# with --batch-size, shorter texts in proportionally larger batches.
+MIN_BUCKET_CHARS = 64
+REFERENCE_CHARS = 1024
+MAX_BATCH_SCALE = 8
+
 
 def parse_args():
     parser = argparse.ArgumentParser(
@@ -65,59 +110,422 @@ def parse_args():
         default=64,
         help="Batch size for encoding (default: 64)",
     )
+    parser.add_argument(
+        "--format",
+        choices=["json", "binary"],
+        default="json",
+        help="Embedding output: inline JSON lists or float32 sidecar files (default: json)",
+    )
+    parser.add_argument(
+        "--cache",
+        default="data/.embedding_cache.sqlite",
+        help="Embedding cache path (default: data/.embedding_cache.sqlite)",
+    )
+    parser.add_argument(
+        "--cache-max-mb",
+        type=int,
+        default=2048,
+        help="Evict least recently used cache entries above this size (default: 2048)",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Do not read or write the embedding cache",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Number of CPU encoding processes (default: 1)",
+    )
+    parser.add_argument(
+        "--threads-per-worker",
+        type=int,
+        default=0,
+        help="Torch threads per worker process, 0=cores/workers (default: 0)",
+    )
+    parser.add_argument(
+        "--chunk-size",
+        type=int,
+        default=2000,
+        help="Movies encoded and written per checkpoint (default: 2000)",
+    )
     return parser.parse_args()
 
 
-def read_movies(path):
-    movies = []
-    with open(path, newline="", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            movies.append(row)
-    return movies
+def text_hash(text):
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
 
 
-def main():
-    args = parse_args()
+class EmbeddingCache:
+    """SQLite-backed embedding cache keyed by (model, field, text hash).
 
-    print(f"Reading {args.input}...")
-    movies = read_movies(args.input)
-    print(f"  Loaded {len(movies)} movies")
+    Vectors are stored as float32 bytes. ``evict`` drops the least recently
+    used entries until the stored vectors fit in the size budget.
+    """
 
-    print("Loading EmbeddingGemma-300M model...")
-    model = SentenceTransformer("google/embeddinggemma-300m")
-    print("  Model loaded")
+    CHUNK = 500  # stay below SQLite's bound-parameter limit
 
-    start = time.time()
+    def __init__(self, path, model_name):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(path)
+        self.model_name = model_name
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            " model TEXT, field TEXT, text_hash TEXT, vector BLOB, last_used REAL,"
+            " PRIMARY KEY (model, field, text_hash))"
+        )
+
+    def get_many(self, field, hashes):
+        """Return ``{hash: vector}`` for the hashes that are cached."""
+        found = {}
+        hashes = list(hashes)
+        now = time.time()
+        for i in range(0, len(hashes), self.CHUNK):
+            chunk = hashes[i : i + self.CHUNK]
+            marks = ",".join("?" * len(chunk))
+            params = [self.model_name, field, *chunk]
+            rows = self.conn.execute(
+                "SELECT text_hash, vector FROM embeddings"
+                f" WHERE model = ? AND field = ? AND text_hash IN ({marks})",
+                params,
+            )
+            for key, blob in rows:
+                found[key] = np.frombuffer(blob, dtype="<f4")
+            self.conn.execute(
+                "UPDATE embeddings SET last_used = ?"
+                f" WHERE model = ? AND field = ? AND text_hash IN ({marks})",
+                [now] + params,
+            )
+        self.conn.commit()
+        return found
+
+    def put_many(self, field, vectors):
+        """Store ``{hash: vector}`` entries."""
+        now = time.time()
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO embeddings VALUES (?, ?, ?, ?, ?)",
+            (
+                (self.model_name, field, key, np.asarray(vec, "<f4").tobytes(), now)
+                for key, vec in vectors.items()
+            ),
+        )
+        self.conn.commit()
+
+    def evict(self, max_bytes):
+        """Delete least recently used entries until the cache fits max_bytes."""
+        (total,) = self.conn.execute(
+            "SELECT COALESCE(SUM(LENGTH(vector)), 0) FROM embeddings"
+        ).fetchone()
+        excess = total - max_bytes
+        if excess <= 0:
+            return 0
+        victims = []
+        for rowid, size in self.conn.execute(
+            "SELECT rowid, LENGTH(vector) FROM embeddings ORDER BY last_used"
+        ):
+            if excess <= 0:
+                break
+            victims.append((rowid,))
+            excess -= size
+        self.conn.executemany("DELETE FROM embeddings WHERE rowid = ?", victims)
+        self.conn.commit()
+        self.conn.execute("VACUUM")
+        return len(victims)
+
+    def close(self):
+        self.conn.close()
+
+
+_worker_model = None
+
+
+def _init_worker(model_name, threads):
+    global _worker_model
+    import torch
+
+    torch.set_num_threads(threads)
+    _worker_model = SentenceTransformer(model_name, device="cpu")
+
+
+def _encode_shard(texts, batch_size):
+    return _worker_model.encode(texts, batch_size=batch_size, show_progress_bar=False)
+
+
+class EncoderPool:
+    """Pool of CPU worker processes, each holding its own model copy.
 
+    ``encode`` has the same shape as ``SentenceTransformer.encode``: the texts
+    are split into shards, encoded in parallel and concatenated in order.
+    """
+
+    SHARDS_PER_WORKER = 4
+
+    def __init__(self, model_name, workers, threads):
+        self.workers = workers
+        self.executor = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(model_name, threads),
+        )
+
+    def encode(self, texts, batch_size, show_progress_bar=False):
+        # Whole batches per shard, and enough shards to keep every worker busy
+        per_shard = -(-len(texts) // (self.workers * self.SHARDS_PER_WORKER))
+        per_shard = max(batch_size, -(-per_shard // batch_size) * batch_size)
+        shards = [texts[i : i + per_shard] for i in range(0, len(texts), per_shard)]
+        results = self.executor.map(_encode_shard, shards, repeat(batch_size))
+        return np.concatenate(list(results))
+
+    def close(self):
+        self.executor.shutdown()
+
+
+def length_buckets(texts, batch_size):
+    """Split texts into length buckets, each with its own batch size.
+
+    Texts are sorted by length and grouped by power-of-two character length,
+    so every batch pads to a similar length. Batch sizes scale inversely with
+    the bucket's length (relative to a ~150-word description getting
+    ``batch_size``), keeping the work per batch roughly constant.
+    Yields ``(batch size, [text index, ...])``.
+    """
+    order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+    bucket = []
+    upper = MIN_BUCKET_CHARS
+    for i in order:
+        if len(texts[i]) > upper and bucket:
+            yield bucket_batch_size(upper, batch_size), bucket
+            bucket = []
+        while len(texts[i]) > upper:
+            upper *= 2
+        bucket.append(i)
+    if bucket:
+        yield bucket_batch_size(upper, batch_size), bucket
+
+
+def bucket_batch_size(upper, batch_size):
+    scaled = batch_size * REFERENCE_CHARS // upper
+    return max(1, min(batch_size * MAX_BATCH_SCALE, scaled))
+
+
+def encode_all(model, cache, movies, batch_size):
+    """Encode every text field of every movie in a single scheduled pass.
+
+    All (movie, field) texts are gathered first. Cached texts are skipped,
+    identical texts are encoded once even across fields, and the rest are
+    encoded bucket by bucket in length order. Results are scattered back
+    into one float32 matrix per field, in movie order.
+    """
+    field_keys = {}
+    texts_by_key = {}
+    vectors = {}  # (field, text hash) -> vector
     for field in TEXT_FIELDS:
-        print(f"Encoding {field}...")
         texts = [m.get(field, "") or "" for m in movies]
+        keys = [text_hash(t) for t in texts]
+        field_keys[field] = keys
+        unique = dict(zip(keys, texts))
+        cached = cache.get_many(field, unique) if cache else {}
+        vectors.update(((field, k), v) for k, v in cached.items())
+        for k, text in unique.items():
+            if k not in cached:
+                texts_by_key.setdefault(k, text)
+
+    total = sum(len(keys) for keys in field_keys.values())
+    cached = sum((f, k) in vectors for f, keys in field_keys.items() for k in keys)
+    missing = list(texts_by_key)
+    texts = [texts_by_key[k] for k in missing]
+    print(f"  {total} texts, {cached} cached, {len(texts)} unique to encode")
+
+    encoded = {}
+    for bucket_batch, indexes in length_buckets(texts, batch_size):
+        print(
+            f"  Encoding {len(indexes)} texts of up to "
+            f"{len(texts[indexes[-1]])} chars (batch {bucket_batch})"
+        )
         embeddings = model.encode(
-            texts, batch_size=args.batch_size, show_progress_bar=True
+            [texts[i] for i in indexes],
+            batch_size=bucket_batch,
+            show_progress_bar=True,
         )
-        for i, emb in enumerate(embeddings):
-            movies[i][f"{field}_embedding"] = emb.tolist()
-        elapsed = time.time() - start
-        print(f"  {field} done ({elapsed:.1f}s elapsed)")
-
-    # Build output docs
-    docs = []
-    for m in movies:
-        doc = {}
-        for f in CSV_FIELDS:
-            doc[f] = m.get(f, "")
-        for f in TEXT_FIELDS:
-            doc[f"{f}_embedding"] = m[f"{f}_embedding"]
-        docs.append(doc)
-
-    print(f"Writing {args.output}...")
-    with open(args.output, "w", encoding="utf-8") as f:
-        json.dump(docs, f, ensure_ascii=False)
+        for i, emb in zip(indexes, embeddings):
+            encoded[missing[i]] = emb
+
+    for field, keys in field_keys.items():
+        new = {k: encoded[k] for k in dict.fromkeys(keys) if (field, k) not in vectors}
+        if cache and new:
+            cache.put_many(field, new)
+        vectors.update(((field, k), v) for k, v in new.items())
+
+    return {
+        field: np.stack([vectors[(field, k)] for k in keys]).astype("<f4", copy=False)
+        for field, keys in field_keys.items()
+    }
+
+
+def sidecar_dir(output):
+    """Directory holding the binary embedding sidecar for an output JSON."""
+    return Path(output).with_suffix(".vectors")
+
+
+class ChunkedOutput:
+    """Append encoded chunks to the output and checkpoint after each one.
+
+    The JSON array (and, in binary mode, the per-field float32 files) grow
+    chunk by chunk. After every chunk the files are fsynced and
+    ``<output>.checkpoint`` records how many rows and bytes are complete, so
+    an interrupted run truncates back to that point and carries on.
+    """
+
+    def __init__(self, output, input_path, binary):
+        self.output = Path(output)
+        self.binary = binary
+        self.checkpoint_path = Path(f"{output}.checkpoint")
+        self.state = {
+            "input": str(input_path),
+            "format": "binary" if binary else "json",
+        }
+        self.ids = []
+        self.rows = 0
+        self.dim = None
+
+        saved = self._load_checkpoint()
+        if saved:
+            self.rows = saved["rows"]
+            self.dim = saved["dim"]
+            self.out = open(self.output, "r+b")
+            self.out.truncate(saved["offset"])
+            self.out.seek(saved["offset"])
+        else:
+            self.out = open(self.output, "wb")
+            self.out.write(b"[")
+
+        self.vector_files = {}
+        if binary:
+            sidecar = sidecar_dir(output)
+            sidecar.mkdir(parents=True, exist_ok=True)
+            for field in TEXT_FIELDS:
+                path = sidecar / f"{field}.f32"
+                handle = open(path, "r+b" if saved else "wb")
+                if saved:
+                    size = self.rows * (self.dim or 0) * 4
+                    handle.truncate(size)
+                    handle.seek(size)
+                self.vector_files[field] = handle
+
+    def _load_checkpoint(self):
+        if not self.checkpoint_path.exists() or not self.output.exists():
+            return None
+        with open(self.checkpoint_path, encoding="utf-8") as f:
+            saved = json.load(f)
+        if any(saved.get(k) != v for k, v in self.state.items()):
+            print("  Checkpoint is for a different input or format, starting over")
+            return None
+        return saved
+
+    def write_chunk(self, movies, field_embeddings):
+        for i, m in enumerate(movies):
+            doc = {f: m.get(f, "") for f in CSV_FIELDS}
+            if not self.binary:
+                for f in TEXT_FIELDS:
+                    doc[f"{f}_embedding"] = field_embeddings[f][i].tolist()
+            if self.rows + i:
+                self.out.write(b",")
+            self.out.write(json.dumps(doc, ensure_ascii=False).encode("utf-8"))
+        for field, handle in self.vector_files.items():
+            matrix = field_embeddings[field].astype("<f4", copy=False)
+            self.dim = matrix.shape[1]
+            matrix.tofile(handle)
+        self.rows += len(movies)
+        self.ids.extend(m["movieId"] for m in movies)
+
+        for handle in [self.out, *self.vector_files.values()]:
+            handle.flush()
+            os.fsync(handle.fileno())
+        state = dict(self.state, rows=self.rows, offset=self.out.tell(), dim=self.dim)
+        tmp = self.checkpoint_path.with_suffix(".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(state, f)
+        os.replace(tmp, self.checkpoint_path)
+
+    def finish(self):
+        self.out.write(b"]")
+        self.out.close()
+        for handle in self.vector_files.values():
+            handle.close()
+        if self.binary:
+            index = {
+                "model": MODEL_NAME,
+                "dim": self.dim or 0,
+                "dtype": "<f4",
+                "count": len(self.ids),
+                "fields": TEXT_FIELDS,
+                "ids": self.ids,
+            }
+            with open(
+                sidecar_dir(self.output) / "index.json", "w", encoding="utf-8"
+            ) as f:
+                json.dump(index, f)
+        self.checkpoint_path.unlink(missing_ok=True)
+
+
+def main():
+    args = parse_args()
+    binary = args.format == "binary"
+
+    if args.workers > 1:
+        threads = args.threads_per_worker or max(
+            1, (os.cpu_count() or 1) // args.workers
+        )
+        print(
+            f"Starting {args.workers} EmbeddingGemma-300M workers "
+            f"({threads} threads each)..."
+        )
+        model = EncoderPool(MODEL_NAME, args.workers, threads)
+    else:
+        print("Loading EmbeddingGemma-300M model...")
+        model = SentenceTransformer(MODEL_NAME)
+        print("  Model loaded")
+
+    cache = None if args.no_cache else EmbeddingCache(args.cache, MODEL_NAME)
+    output = ChunkedOutput(args.output, args.input, binary)
+
+    start = time.time()
+    print(f"Reading {args.input}...")
+    with open(args.input, newline="", encoding="utf-8") as f:
+        reader = csv.DictReader(f)
+        # Rows before the checkpoint are already written; only collect ids
+        output.ids.extend(m["movieId"] for m in islice(reader, output.rows))
+        if output.rows:
+            print(f"  Resuming after {output.rows} movies")
+
+        while True:
+            movies = list(islice(reader, args.chunk_size))
+            if not movies:
+                break
+            print(f"Encoding movies {output.rows + 1}-{output.rows + len(movies)}...")
+            field_embeddings = encode_all(model, cache, movies, args.batch_size)
+            output.write_chunk(movies, field_embeddings)
+            print(
+                f"  {output.rows} movies written ({time.time() - start:.1f}s elapsed)"
+            )
+
+    output.finish()
+    if isinstance(model, EncoderPool):
+        model.close()
+
+    if cache:
+        evicted = cache.evict(args.cache_max_mb * 1024 * 1024)
+        if evicted:
+            print(f"Evicted {evicted} old entries from {args.cache}")
+        cache.close()
 
     elapsed = time.time() - start
-    print(f"Done! {len(docs)} movies with embeddings in {elapsed:.1f}s")
+    print(f"Done! {output.rows} movies with embeddings in {elapsed:.1f}s")
     print(f"Output: {args.output}")
+    if binary:
+        print(f"Embeddings: {sidecar_dir(args.output)}")
 
 
 if __name__ == "__main__":
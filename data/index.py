@@ -1,10 +1,38 @@
+"""
+Index data/movies_enriched_with_embeddings.json into the movies_enriched index.
+
+Embeddings are read either inline from the JSON documents or, when the file
+was written with ``generate_embeddings.py --format binary``, from the float32
+sidecar directory next to it, which is memory-mapped rather than parsed.
+
+With --fast-load, refreshes and replicas are switched off while loading and
+restored afterwards (optionally after a force-merge), then the index is
+waited on until green (yellow on a single data node).
+
+With --alias-swap, the live index is not touched during the load: movies go
+into a new versioned index (movies_enriched-<UTC timestamp>, fast-loaded),
+the movies_enriched alias is moved to it atomically, and older versions
+beyond --keep-versions are deleted. If any movie failed to index or the new
+index did not become healthy, it is deleted instead and the alias is left
+alone.
+
+Usage:
+    python data/index.py [--input PATH] [--embeddings DIR]
+                         [--fast-load [--translog-async] [--force-merge]]
+                         [--alias-swap [--keep-versions N]]
+"""
+
+import argparse
+import itertools
 import json
+import mmap
 import os
+import sys
 import time
+from pathlib import Path
 
-from elasticsearch import Elasticsearch
-
-BATCH_SIZE = 500
+import bulk
+from elasticsearch import ApiError, Elasticsearch, TransportError
 
 TEXT_FIELDS = [
     "abstract_en",
@@ -17,8 +45,47 @@ TEXT_FIELDS = [
 
 EMBEDDING_DIM = 768
 
+INDEX_NAME = "movies_enriched"
+
+DEFAULT_INPUT = os.path.join(
+    os.path.dirname(__file__), "..", "data", "movies_enriched_with_embeddings.json"
+)
+
+
+class EmbeddingSidecar:
+    """Float32 embedding matrices written by generate_embeddings.py --format binary.
+
+    Each field file is memory-mapped and vectors are formatted straight from
+    the mapped buffer, so nothing is parsed and the OS pages data in lazily.
+    """
+
+    def __init__(self, path):
+        path = Path(path)
+        with open(path / "index.json", encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta.get("dtype") != "<f4" or sys.byteorder != "little":
+            raise ValueError(f"Unsupported embedding sidecar layout in {path}")
+        self.dim = meta["dim"]
+        self.rows = {str(movie_id): i for i, movie_id in enumerate(meta["ids"])}
+        self.views = {}
+        for field in meta["fields"]:
+            with open(path / f"{field}.f32", "rb") as f:
+                mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            self.views[field] = memoryview(mapped).cast("f")
+        # 9 significant digits round-trip float32 exactly
+        self._template = ",".join(["%.9g"] * self.dim)
 
-def create_index(client, index_name):
+    def json_fields(self, movie_id) -> str:
+        """JSON members ``"<field>_embedding": [...]`` for one movie."""
+        row = self.rows[str(movie_id)]
+        start, end = row * self.dim, (row + 1) * self.dim
+        return ", ".join(
+            f'"{field}_embedding": [{self._template % tuple(view[start:end])}]'
+            for field, view in self.views.items()
+        )
+
+
+def create_index(client, index_name, delete_existing=True):
     properties = {
         "title": {"type": "text"},
         "genres": {"type": "keyword"},
@@ -33,7 +100,7 @@ def create_index(client, index_name):
             "similarity": "cosine",
         }
 
-    if client.indices.exists(index=index_name):
+    if delete_existing and client.indices.exists(index=index_name):
         client.indices.delete(index=index_name)
 
     client.indices.create(
@@ -45,6 +112,72 @@ def create_index(client, index_name):
     )
 
 
+def swap_alias(client, alias, new_index):
+    """Point ``alias`` at ``new_index`` in one atomic ``_aliases`` call.
+
+    Returns the indices the alias pointed to before.
+    """
+    response = client.options(ignore_status=404).indices.get_alias(name=alias)
+    current = list(response.body) if response.meta.status == 200 else []
+    legacy = not current and bool(client.indices.exists(index=alias))
+    client.indices.update_aliases(
+        actions=bulk.alias_swap_actions(alias, new_index, current, legacy)
+    )
+    previous = ", ".join(current) or (f"index '{alias}'" if legacy else "nothing")
+    print(f"Alias '{alias}' now points to '{new_index}' (was {previous})")
+    return current
+
+
+def delete_old_versions(client, alias, live, keep=1, previous=()):
+    """Delete versioned indices of ``alias`` except the live and ``keep`` older.
+
+    The versions in ``previous`` (where the alias pointed before the swap)
+    are the first ones kept.
+    """
+    rows = client.cat.indices(index=f"{alias}-*", format="json", h="index")
+    names = [row["index"] for row in rows]
+    for name in bulk.stale_versions(alias, names, live, keep, previous):
+        client.indices.delete(index=name)
+        print(f"Deleted old version '{name}'")
+
+
+def begin_fast_load(client, index_name, translog=False):
+    """Apply load-optimised settings; return the settings that undo them."""
+    applied = bulk.fast_load_settings(translog)
+    response = client.indices.get_settings(index=index_name, flat_settings=True)
+    current = next(iter(response.body.values()))["settings"]
+    client.indices.put_settings(index=index_name, settings=applied)
+    print("Fast load: " + ", ".join(f"{k}={v}" for k, v in applied.items()))
+    return bulk.settings_to_restore(current, applied)
+
+
+def finish_fast_load(client, index_name, restore, force_merge=False):
+    """Refresh, optionally force-merge, restore settings and wait for health.
+
+    Returns False if the index did not reach green (yellow on a single data
+    node) within 60s.
+    """
+    client.indices.refresh(index=index_name)
+    if force_merge:
+        print(f"Force-merging '{index_name}' to one segment...")
+        client.options(request_timeout=3600).indices.forcemerge(
+            index=index_name, max_num_segments=1
+        )
+    # Replicas come back after the merge, so they copy the merged segments
+    client.indices.put_settings(index=index_name, settings=restore)
+    print(f"Restored settings on '{index_name}'")
+    target = bulk.expected_health(client.cluster.health()["number_of_data_nodes"])
+    health = client.options(ignore_status=408, request_timeout=70).cluster.health(
+        index=index_name, wait_for_status=target, timeout="60s"
+    )
+    status = health.get("status")
+    if status in ("green", target):
+        print(f"Index '{index_name}' is {status}")
+        return True
+    print(f"Warning: index '{index_name}' is {status} after 60s")
+    return False
+
+
 def make_doc(row):
     try:
         split = row["title"].split("(")
@@ -71,48 +204,196 @@ def make_doc(row):
         print(f"Error processing row: {row.get('title', 'unknown')}: {e}")
 
 
-def index_batch(client, batch):
-    actions = []
-    for row in batch:
-        actions.append({"index": {"_index": "movies_enriched", "_id": row["movieId"]}})
-        actions.append(make_doc(row))
-    client.bulk(operations=actions)
+def has_inline_embeddings(row):
+    return any(f"{field}_embedding" in row for field in TEXT_FIELDS)
+
+
+def bulk_pair(row, sidecar=None, index_name=INDEX_NAME):
+    action = {"index": {"_index": index_name, "_id": row["movieId"]}}
+    doc = make_doc(row)
+    if sidecar is None or doc is None or not sidecar.views:
+        return action, doc
+    # Sidecar vectors replace inline ones, so no key appears twice
+    for field in sidecar.views:
+        doc.pop(f"{field}_embedding", None)
+    # Splice the pre-formatted vectors into the encoded document
+    source = json.dumps(doc)[:-1] + ", " + sidecar.json_fields(row["movieId"]) + "}"
+    return action, source.encode("utf-8")
+
+
+def index_batch(client, batch, body, sizer, to_pair, dead_letter, retries=5):
+    """Send one bulk body; return how many of ``batch`` were indexed.
+
+    Documents rejected with a retryable status are resent after a backoff.
+    Permanent failures, and rejections still left after ``retries`` attempts,
+    go to ``dead_letter``.
+    """
+    retry = []
+    indexed = 0
+    for attempt in range(retries + 1):
+        start = time.perf_counter()
+        try:
+            result = client.bulk(operations=body)
+        except ApiError as e:
+            if e.meta.status != 429 or attempt == retries:
+                raise
+            # Nothing was indexed, so shrink later batches and resend this one
+            sizer.record(len(body), time.perf_counter() - start, True)
+            time.sleep(bulk.backoff_delay(attempt))
+            continue
+        done, retry, failed = bulk.split_response(result.body, batch)
+        sizer.record(len(body), time.perf_counter() - start, bool(retry))
+        indexed += done
+        for doc, outcome in failed:
+            dead_letter.write(doc, outcome.get("status"), outcome["error"])
+        if not retry or attempt == retries:
+            break
+        time.sleep(bulk.backoff_delay(attempt))
+        buffer = bulk.BulkBuffer()
+        for doc in retry:
+            buffer.add(*to_pair(doc))
+        batch, body = retry, buffer.take()
+    for doc in retry:
+        dead_letter.write(doc, None, "retries exhausted")
+    return indexed
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Index enriched movies")
+    parser.add_argument(
+        "--input",
+        default=DEFAULT_INPUT,
+        help="Movies JSON or NDJSON file (default: data/movies_enriched_with_embeddings.json)",
+    )
+    parser.add_argument(
+        "--embeddings",
+        default=None,
+        help="Binary embedding sidecar directory (default: <input>.vectors if present "
+        "and the input has no inline embeddings)",
+    )
+    parser.add_argument(
+        "--dead-letter",
+        default=f"{INDEX_NAME}.dead-letter.ndjson",
+        help="File for movies that fail permanently "
+        f"(default: {INDEX_NAME}.dead-letter.ndjson)",
+    )
+    parser.add_argument(
+        "--fast-load",
+        action="store_true",
+        help="Disable refresh and replicas during the load, restore them afterwards",
+    )
+    parser.add_argument(
+        "--translog-async",
+        action="store_true",
+        help="With --fast-load, also fsync the translog asynchronously",
+    )
+    parser.add_argument(
+        "--force-merge",
+        action="store_true",
+        help="With --fast-load, force-merge to one segment before restoring replicas",
+    )
+    parser.add_argument(
+        "--alias-swap",
+        action="store_true",
+        help="Load into a new versioned index and atomically move the alias to it",
+    )
+    parser.add_argument(
+        "--keep-versions",
+        type=int,
+        default=1,
+        help="With --alias-swap, older index versions kept for rollback (default: 1)",
+    )
+    return parser.parse_args()
 
 
 def main():
+    args = parse_args()
     client = Elasticsearch(
         hosts=[os.getenv("ELASTICSEARCH_URL", "http://localhost:9200")],
         basic_auth=("elastic", "elastic"),
     )
 
-    input_path = os.path.join(
-        os.path.dirname(__file__), "..", "data", "movies_enriched_with_embeddings.json"
-    )
+    # Stream movies so indexing starts before the whole file is parsed
+    movies = bulk.iter_json_documents(args.input)
+    first = next(movies, None)
+    if first is not None:
+        movies = itertools.chain([first], movies)
 
-    create_index(client, "movies_enriched")
+    # A leftover <input>.vectors is only picked up when the rows carry no
+    # vectors of their own; --embeddings always wins
+    sidecar_path = args.embeddings
+    if sidecar_path is None and first is not None and not has_inline_embeddings(first):
+        sidecar_path = Path(args.input).with_suffix(".vectors")
+    sidecar = None
+    if sidecar_path is not None and Path(sidecar_path).is_dir():
+        sidecar = EmbeddingSidecar(sidecar_path)
+        print(f"Using float32 embeddings from {sidecar_path}")
 
-    start = time.time()
-    batch = []
-    count = 0
+    index_name = INDEX_NAME
+    if args.alias_swap:
+        index_name = bulk.versioned_index_name(INDEX_NAME)
 
-    with open(input_path, encoding="utf-8") as f:
-        movies = json.load(f)
+    def to_pair(row):
+        return bulk_pair(row, sidecar, index_name)
+
+    create_index(client, index_name, delete_existing=not args.alias_swap)
+    # A versioned index that never went live is deleted whatever happened,
+    # so it cannot later be mistaken for a rollback version
+    swapped = False
+    try:
+        restore = None
+        if args.fast_load or args.alias_swap:
+            restore = begin_fast_load(client, index_name, args.translog_async)
 
-    for row in movies:
-        batch.append(row)
-        if len(batch) >= BATCH_SIZE:
-            index_batch(client, batch)
-            count += len(batch)
-            print(f"Indexed {count} movies...")
-            batch = []
+        start = time.time()
+        count = 0
+        indexed = 0
+        healthy = True
+        # Each movie carries six 768-dim vectors, so cut batches by payload size
+        sizer = bulk.AdaptiveBatchSizer()
 
-    if batch:
-        index_batch(client, batch)
-        count += len(batch)
+        try:
+            with bulk.DeadLetterFile(args.dead_letter) as dead_letter:
+                for batch, body in bulk.iter_batches(movies, to_pair, sizer):
+                    indexed += index_batch(
+                        client, batch, body, sizer, to_pair, dead_letter
+                    )
+                    count += len(batch)
+                    print(
+                        f"Indexed {indexed}/{count} movies "
+                        f"(batch target {sizer.target_bytes // 1024} KB)..."
+                    )
+        finally:
+            if restore is not None:
+                healthy = finish_fast_load(
+                    client, index_name, restore, args.force_merge
+                )
 
-    print(f"Indexed {count} movies in {time.time() - start:.1f}s")
+        print(f"Indexed {indexed} of {count} movies in {time.time() - start:.1f}s")
+        if dead_letter.count:
+            print(
+                f"Warning: {dead_letter.count} movies failed permanently, "
+                f"see {dead_letter.path}"
+            )
+        if args.alias_swap:
+            # Only a complete, healthy load may replace the live index
+            if not count or indexed != count or not healthy:
+                print(f"Error: alias '{INDEX_NAME}' left unchanged")
+                sys.exit(1)
+            previous = swap_alias(client, INDEX_NAME, index_name)
+            swapped = True
+            delete_old_versions(
+                client, INDEX_NAME, index_name, args.keep_versions, previous
+            )
+    finally:
+        if args.alias_swap and not swapped:
+            try:
+                client.indices.delete(index=index_name)
+                print(f"Deleted incomplete index '{index_name}'")
+            except (ApiError, TransportError) as e:
+                print(f"Warning: could not delete incomplete index '{index_name}': {e}")
 
-    print(client.search(index="movies_enriched", body={"query": {"match_all": {}}}))
+    print(client.search(index=INDEX_NAME, body={"query": {"match_all": {}}}))
 
 
 if __name__ == "__main__":
@@ -8,16 +8,27 @@ Usage:
     python data/load_data.py --dataset movies --size small
     python data/load_data.py --dataset movies --size full
     python data/load_data.py --dataset movies --with-embeddings
+    python data/load_data.py --dataset movies --size full --async --concurrency 4
 
 Requirements:
     pip install requests
+    pip install aiohttp   # only for --async
 """
 
 import argparse
+import asyncio
+import heapq
+import itertools
 import json
 import sys
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from pathlib import Path
 
+import bulk
+import es_client
+
 try:
     import requests
     from requests.packages.urllib3.exceptions import InsecureRequestWarning
@@ -27,6 +38,11 @@ except ImportError:
     print("Error: requests library required. Install with: pip install requests")
     sys.exit(1)
 
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
 # Dataset configurations
 DATASETS = {
     "movies": {
@@ -72,24 +88,70 @@ DATASETS = {
 }
 
 
+def print_throughput(docs: int, num_bytes: int, elapsed: float) -> None:
+    """Print a one-line ingest throughput summary."""
+    elapsed = max(elapsed, 1e-9)
+    mb = num_bytes / (1024 * 1024)
+    print(
+        f"Indexed {docs} documents ({mb:.1f} MB) in {elapsed:.1f}s: "
+        f"{docs / elapsed:.0f} docs/s, {mb / elapsed:.2f} MB/s"
+    )
+
+
+def print_load_summary(loaded, total_bytes, elapsed, retried, dead_letter) -> None:
+    """Print throughput, retries and permanent failures after a bulk load."""
+    print_throughput(loaded, total_bytes, elapsed)
+    if retried:
+        print(f"Retried {retried} rejected documents")
+    if dead_letter.count:
+        print(
+            f"Warning: {dead_letter.count} documents failed permanently, "
+            f"see {dead_letter.path}"
+        )
+
+
+def handle_bulk_response(status: int, text: str, batch: list, dead_letter) -> tuple:
+    """Sort one ``_bulk`` response into ``(indexed, documents to retry)``.
+
+    Permanent failures are written to ``dead_letter``.
+    """
+    if status in [200, 201]:
+        indexed, retry, failed = bulk.split_response(json.loads(text), batch)
+        for doc, outcome in failed:
+            dead_letter.write(doc, outcome.get("status"), outcome["error"])
+        return indexed, retry
+    if bulk.is_retryable(status):
+        return 0, batch
+    print(f"Bulk load failed: {status}")
+    print(text[:500])
+    for doc in batch:
+        dead_letter.write(doc, status, text)
+    return 0, []
+
+
 class DataLoader:
     """Load data into Elasticsearch."""
 
-    def __init__(self, base_url: str, auth: tuple = None, verify_ssl: bool = True):
+    def __init__(
+        self,
+        base_url: str,
+        auth: tuple = None,
+        verify_ssl: bool = True,
+        pool_size: int = es_client.DEFAULT_POOL_SIZE,
+        keep_alive: bool = True,
+    ):
         self.base_url = base_url.rstrip("/")
         self.auth = auth
         self.verify_ssl = verify_ssl
         self.script_dir = Path(__file__).parent
+        self.client = es_client.ClusterClient(
+            base_url, auth, verify_ssl, pool_size=pool_size, keep_alive=keep_alive
+        )
 
     def check_connection(self) -> bool:
         """Verify Elasticsearch is accessible."""
         try:
-            response = requests.get(
-                f"{self.base_url}/_cluster/health",
-                auth=self.auth,
-                verify=self.verify_ssl,
-                timeout=10,
-            )
+            response = self.client.get("_cluster/health")
             if response.status_code == 200:
                 health = response.json()
                 print(f"Connected to cluster: {health.get('cluster_name')}")
@@ -106,23 +168,19 @@ class DataLoader:
         self, index_name: str, mapping: dict, delete_existing: bool = True
     ) -> bool:
         """Create an index with mapping."""
-        url = f"{self.base_url}/{index_name}"
-
         # Delete existing index if requested
         if delete_existing:
             try:
-                requests.delete(url, auth=self.auth, verify=self.verify_ssl, timeout=10)
+                self.client.delete(index_name)
                 print(f"Deleted existing index '{index_name}'")
             except Exception:
                 pass
 
         # Create index with mapping
         try:
-            response = requests.put(
-                url,
+            response = self.client.put(
+                index_name,
                 json={"mappings": mapping},
-                auth=self.auth,
-                verify=self.verify_ssl,
                 timeout=30,
                 headers={"Content-Type": "application/json"},
             )
@@ -137,49 +195,412 @@ class DataLoader:
             print(f"Error creating index: {e}")
             return False
 
-    def bulk_load(self, index_name: str, documents: list, batch_size: int = 500) -> int:
-        """Load documents using bulk API."""
-        url = f"{self.base_url}/_bulk"
-        loaded = 0
+    def swap_alias(self, alias: str, new_index: str):
+        """Point ``alias`` at ``new_index`` in one atomic ``_aliases`` call.
 
-        for i in range(0, len(documents), batch_size):
-            batch = documents[i : i + batch_size]
-            bulk_body = ""
+        A concrete index named ``alias``, left by a load without alias
+        swapping, is removed in the same call. Returns the indices the alias
+        pointed to before, or None if the swap failed.
+        """
+        try:
+            response = self.client.get(f"_alias/{alias}")
+            current = list(response.json()) if response.status_code == 200 else []
+            legacy = not current and self.client.head(alias).status_code == 200
+            actions = bulk.alias_swap_actions(alias, new_index, current, legacy)
+            response = self.client.post("_aliases", json={"actions": actions})
+        except requests.exceptions.RequestException as e:
+            print(f"Error swapping alias: {e}")
+            return None
+        if response.status_code != 200:
+            print(f"Failed to swap alias: {response.status_code}")
+            print(response.text)
+            return None
+        previous = ", ".join(current) or (f"index '{alias}'" if legacy else "nothing")
+        print(f"Alias '{alias}' now points to '{new_index}' (was {previous})")
+        return current
+
+    def delete_old_versions(
+        self, alias: str, live: str, keep: int = 1, previous=()
+    ) -> None:
+        """Delete versioned indices of ``alias`` except the live and ``keep`` older.
+
+        The versions in ``previous`` (where the alias pointed before the
+        swap) are the first ones kept.
+        """
+        try:
+            response = self.client.get(
+                f"_cat/indices/{alias}-*", params={"format": "json", "h": "index"}
+            )
+            response.raise_for_status()
+            names = [row["index"] for row in response.json()]
+            for name in bulk.stale_versions(alias, names, live, keep, previous):
+                self.client.delete(name).raise_for_status()
+                print(f"Deleted old version '{name}'")
+        except (requests.exceptions.RequestException, ValueError, KeyError) as e:
+            print(f"Warning: could not clean up old versions of '{alias}': {e}")
+
+    def discard_index(self, index_name: str) -> None:
+        """Delete a versioned index whose load did not complete."""
+        try:
+            self.client.delete(index_name).raise_for_status()
+            print(f"Deleted incomplete index '{index_name}'")
+        except requests.exceptions.RequestException as e:
+            print(f"Warning: could not delete incomplete index '{index_name}': {e}")
+
+    def begin_fast_load(self, index_name: str, translog: bool = False) -> dict:
+        """Switch an index to load-optimised settings before a bulk load.
+
+        Returns the flat settings that undo the change (for
+        ``finish_fast_load``), or None if the settings could not be changed,
+        in which case the load simply runs with the index as it is.
+        """
+        applied = bulk.fast_load_settings(translog)
+        try:
+            response = self.client.get(
+                f"{index_name}/_settings", params={"flat_settings": "true"}
+            )
+            response.raise_for_status()
+            current = next(iter(response.json().values()))["settings"]
+            self.client.put(f"{index_name}/_settings", json=applied).raise_for_status()
+        except (requests.exceptions.RequestException, StopIteration, KeyError) as e:
+            print(f"Warning: could not apply fast-load settings: {e}")
+            return None
+        print(
+            "Fast load: "
+            + ", ".join(f"{key}={value}" for key, value in applied.items())
+        )
+        return bulk.settings_to_restore(current, applied)
 
-            for doc in batch:
-                action = {"index": {"_index": index_name, "_id": doc.get("id")}}
-                bulk_body += json.dumps(action) + "\n"
-                bulk_body += json.dumps(doc) + "\n"
+    def finish_fast_load(
+        self, index_name: str, restore: dict, force_merge: bool = False
+    ) -> bool:
+        """Refresh, optionally force-merge, restore settings and wait for health.
 
+        Merging happens before replicas are re-enabled so they copy the
+        merged segments instead of redoing the merge. Returns False if any
+        step failed or the index did not become healthy in time.
+        """
+        try:
+            self.client.post(f"{index_name}/_refresh", timeout=300).raise_for_status()
+            if force_merge:
+                print(f"Force-merging '{index_name}' to one segment...")
+                self.client.post(
+                    f"{index_name}/_forcemerge",
+                    params={"max_num_segments": 1},
+                    timeout=None,
+                ).raise_for_status()
+            self.client.put(f"{index_name}/_settings", json=restore).raise_for_status()
+            print(f"Restored settings on '{index_name}'")
+        except requests.exceptions.RequestException as e:
+            print(f"Error finishing fast load: {e}")
+            return False
+        return self.wait_for_health(index_name)
+
+    def wait_for_health(self, index_name: str, timeout: int = 60) -> bool:
+        """Wait until an index reaches the best status the cluster allows.
+
+        That is green, or yellow on a single data node, where replicas can
+        never be assigned.
+        """
+        try:
+            response = self.client.get("_cluster/health")
+            response.raise_for_status()
+            target = bulk.expected_health(response.json()["number_of_data_nodes"])
+            response = self.client.get(
+                f"_cluster/health/{index_name}",
+                params={"wait_for_status": target, "timeout": f"{timeout}s"},
+                timeout=timeout + 10,
+            )
+            status = response.json().get("status")
+        except (requests.exceptions.RequestException, ValueError, KeyError) as e:
+            print(f"Warning: could not check health of '{index_name}': {e}")
+            return False
+        if status in ("green", target):
+            print(f"Index '{index_name}' is {status}")
+            return True
+        print(
+            f"Warning: index '{index_name}' is {status} after {timeout}s "
+            "(replicas may not fit on this cluster)"
+        )
+        return False
+
+    def _send_bulk(self, url: str, body: bytes) -> tuple:
+        """Send one bulk request and return ``(response, latency)``."""
+        start = time.perf_counter()
+        response = self.client.post(
+            url,
+            data=body,
+            timeout=60,
+            headers={"Content-Type": "application/x-ndjson"},
+        )
+        return response, time.perf_counter() - start
+
+    def bulk_load(
+        self,
+        index_name: str,
+        documents,
+        batch_bytes: int = bulk.DEFAULT_BATCH_BYTES,
+        concurrency: int = 1,
+        max_retries: int = 5,
+        dead_letter_path: str = None,
+    ) -> int:
+        """Load documents using bulk API.
+
+        ``documents`` may be any iterable and is consumed lazily, only as fast
+        as batches are sent. Batches are cut at roughly ``batch_bytes`` of
+        NDJSON payload, and the target size adapts to observed latency and 429
+        rejections. Up to ``concurrency`` ``_bulk`` requests are kept in
+        flight. Batches are built in input order and document ``_id``s come
+        from each document's ``id`` field, so the resulting index is the same
+        regardless of concurrency.
+
+        Responses are checked item by item. Only documents rejected with a
+        retryable status (429, 503, ``es_rejected_execution_exception``) are
+        sent again, after an exponential backoff. Permanent failures, and
+        documents still rejected after ``max_retries`` attempts, are appended
+        to ``dead_letter_path`` (default ``<index>.dead-letter.ndjson``).
+
+        Returns the number of documents actually indexed.
+        """
+        url = f"{self.base_url}/_bulk"
+        concurrency = max(1, concurrency)
+        sizer = bulk.AdaptiveBatchSizer(batch_bytes)
+        dead_letter = bulk.DeadLetterFile(
+            dead_letter_path or f"{index_name}.dead-letter.ndjson"
+        )
+        loaded = 0
+        retried = 0
+        total_bytes = 0
+        start = time.perf_counter()
+
+        def to_pair(doc):
+            return {"index": {"_index": index_name, "_id": doc.get("id")}}, doc
+
+        fresh = bulk.iter_batches(documents, to_pair, sizer)
+        ready = deque()  # (attempt, batch, body) waiting for a free slot
+        backlog = []  # heap of (due time, seq, attempt, documents to retry)
+        seq = itertools.count()
+        in_flight = {}  # future -> (attempt, batch, body size)
+
+        def on_done(future):
+            nonlocal loaded, retried
+            attempt, batch, num_bytes = in_flight.pop(future)
+            retry = []
             try:
-                response = requests.post(
-                    url,
-                    data=bulk_body,
-                    auth=self.auth,
-                    verify=self.verify_ssl,
-                    timeout=60,
-                    headers={"Content-Type": "application/x-ndjson"},
+                response, latency = future.result()
+                indexed, retry = handle_bulk_response(
+                    response.status_code, response.text, batch, dead_letter
                 )
-                if response.status_code in [200, 201]:
-                    result = response.json()
-                    if result.get("errors"):
-                        print(
-                            f"Warning: Some documents had errors in batch {i // batch_size + 1}"
-                        )
-                    loaded += len(batch)
-                    print(f"Loaded {loaded}/{len(documents)} documents...")
-                else:
-                    print(f"Bulk load failed: {response.status_code}")
-                    print(response.text[:500])
             except Exception as e:
-                print(f"Bulk load error: {e}")
+                # Network errors, timeouts and unparseable responses
+                print(f"Bulk request error: {e}")
+                retry = batch
+            else:
+                loaded += indexed
+                sizer.record(num_bytes, latency, bool(retry))
+
+            if retry and attempt >= max_retries:
+                for doc in retry:
+                    dead_letter.write(doc, None, "retries exhausted")
+            elif retry:
+                retried += len(retry)
+                due = time.monotonic() + bulk.backoff_delay(attempt)
+                heapq.heappush(backlog, (due, next(seq), attempt + 1, retry))
+            print(
+                f"Loaded {loaded} documents "
+                f"(batch target {sizer.target_bytes // 1024} KB)..."
+            )
 
+        with dead_letter, ThreadPoolExecutor(max_workers=concurrency) as executor:
+            while True:
+                now = time.monotonic()
+                while backlog and backlog[0][0] <= now:
+                    _, _, attempt, docs = heapq.heappop(backlog)
+                    for batch, body in bulk.iter_batches(docs, to_pair, sizer):
+                        ready.append((attempt, batch, body))
+                if not ready and fresh is not None:
+                    batch_and_body = next(fresh, None)
+                    if batch_and_body is None:
+                        fresh = None
+                    else:
+                        ready.append((0, *batch_and_body))
+
+                # Keep at most `concurrency` requests in flight
+                if ready and len(in_flight) < concurrency:
+                    attempt, batch, body = ready.popleft()
+                    total_bytes += len(body)
+                    future = executor.submit(self._send_bulk, url, body)
+                    in_flight[future] = (attempt, batch, len(body))
+                elif in_flight:
+                    timeout = max(0, backlog[0][0] - now) if backlog else None
+                    done, _ = wait(
+                        in_flight, timeout=timeout, return_when=FIRST_COMPLETED
+                    )
+                    for future in done:
+                        on_done(future)
+                elif backlog:
+                    time.sleep(max(0, backlog[0][0] - now))
+                elif not ready and fresh is None:
+                    break
+
+        elapsed = time.perf_counter() - start
+        print_load_summary(loaded, total_bytes, elapsed, retried, dead_letter)
+        return loaded
+
+    async def bulk_load_async(
+        self,
+        index_name: str,
+        documents,
+        batch_bytes: int = bulk.DEFAULT_BATCH_BYTES,
+        concurrency: int = 1,
+        max_retries: int = 5,
+        dead_letter_path: str = None,
+    ) -> int:
+        """Load documents using bulk API over one pooled aiohttp session.
+
+        Same batching, retry and dead-letter behaviour as ``bulk_load``, but
+        the ``concurrency`` in-flight requests share a persistent keep-alive
+        connection pool, and the next batches are parsed and encoded in a
+        background thread while earlier ones are on the wire.
+
+        Returns the number of documents actually indexed.
+        """
+        url = f"{self.base_url}/_bulk"
+        concurrency = max(1, concurrency)
+        sizer = bulk.AdaptiveBatchSizer(batch_bytes)
+        dead_letter = bulk.DeadLetterFile(
+            dead_letter_path or f"{index_name}.dead-letter.ndjson"
+        )
+        loaded = 0
+        retried = 0
+        total_bytes = 0
+        start = time.perf_counter()
+
+        def to_pair(doc):
+            return {"index": {"_index": index_name, "_id": doc.get("id")}}, doc
+
+        fresh = bulk.iter_batches(documents, to_pair, sizer)
+        loop = asyncio.get_running_loop()
+        # (attempt, batch, body); bounded so parsing stays a few batches ahead
+        queue = asyncio.Queue(maxsize=concurrency)
+
+        async def produce():
+            while True:
+                batch_and_body = await loop.run_in_executor(None, next, fresh, None)
+                if batch_and_body is None:
+                    return
+                await queue.put((0, *batch_and_body))
+
+        async def requeue(attempt, docs):
+            # Holds the original item's task_done until the retry is queued
+            try:
+                await asyncio.sleep(bulk.backoff_delay(attempt))
+                for batch, body in bulk.iter_batches(docs, to_pair, sizer):
+                    await queue.put((attempt + 1, batch, body))
+            finally:
+                queue.task_done()
+
+        async def send(session):
+            nonlocal loaded, retried, total_bytes
+            while True:
+                attempt, batch, body = await queue.get()
+                requeued = False
+                try:
+                    total_bytes += len(body)
+                    retry = []
+                    sent = time.perf_counter()
+                    try:
+                        async with session.post(url, data=body) as response:
+                            text = await response.text()
+                            latency = time.perf_counter() - sent
+                        indexed, retry = handle_bulk_response(
+                            response.status, text, batch, dead_letter
+                        )
+                    except Exception as e:
+                        # Network errors, timeouts and unparseable responses
+                        print(f"Bulk request error: {e!r}")
+                        retry = batch
+                    else:
+                        loaded += indexed
+                        sizer.record(len(body), latency, bool(retry))
+
+                    print(
+                        f"Loaded {loaded} documents "
+                        f"(batch target {sizer.target_bytes // 1024} KB)..."
+                    )
+                    if retry and attempt < max_retries:
+                        retried += len(retry)
+                        retries.add(asyncio.create_task(requeue(attempt, retry)))
+                        retries.difference_update([t for t in retries if t.done()])
+                        requeued = True
+                    else:
+                        for doc in retry:
+                            dead_letter.write(doc, None, "retries exhausted")
+                finally:
+                    # A requeued batch is marked done once its retry is queued
+                    if not requeued:
+                        queue.task_done()
+
+        retries = set()  # requeue tasks, referenced until they finish
+        auth = aiohttp.BasicAuth(*self.auth) if self.auth else None
+        if self.client.keep_alive:
+            reuse = {"keepalive_timeout": 60}
+        else:
+            reuse = {"force_close": True}
+        connector = aiohttp.TCPConnector(
+            limit=concurrency, ssl=None if self.verify_ssl else False, **reuse
+        )
+        session = aiohttp.ClientSession(
+            connector=connector,
+            auth=auth,
+            headers={"Content-Type": "application/x-ndjson"},
+            timeout=aiohttp.ClientTimeout(total=60),
+        )
+        with dead_letter:
+            async with session:
+                senders = [
+                    asyncio.create_task(send(session)) for _ in range(concurrency)
+                ]
+                try:
+                    await produce()
+                    await queue.join()
+                finally:
+                    for task in senders + list(retries):
+                        task.cancel()
+                    await asyncio.gather(*senders, *retries, return_exceptions=True)
+
+        elapsed = time.perf_counter() - start
+        print_load_summary(loaded, total_bytes, elapsed, retried, dead_letter)
         return loaded
 
     def load_dataset(
-        self, dataset_name: str, size: str = "small", with_embeddings: bool = False
+        self,
+        dataset_name: str,
+        size: str = "small",
+        with_embeddings: bool = False,
+        concurrency: int = 1,
+        batch_bytes: int = bulk.DEFAULT_BATCH_BYTES,
+        dead_letter_path: str = None,
+        use_async: bool = False,
+        fast_load: bool = False,
+        translog_async: bool = False,
+        force_merge: bool = False,
+        alias_swap: bool = False,
+        keep_versions: int = 1,
     ) -> bool:
-        """Load a dataset into Elasticsearch."""
+        """Load a dataset into Elasticsearch.
+
+        With ``use_async`` the documents go through ``bulk_load_async``.
+        With ``fast_load`` refreshes and replicas are off during the load (see
+        ``begin_fast_load``) and restored afterwards, even if the load fails.
+
+        With ``alias_swap`` the live index is left alone: documents go into a
+        new versioned index (always fast-loaded), the dataset's index name is
+        then moved to it as an alias in one atomic step, and all but
+        ``keep_versions`` older versions are deleted. The alias only moves if
+        every document was indexed and the new index became healthy;
+        otherwise the new index is deleted and False is returned.
+        """
         if dataset_name not in DATASETS:
             print(f"Unknown dataset: {dataset_name}")
             print(f"Available datasets: {list(DATASETS.keys())}")
@@ -197,32 +618,76 @@ class DataLoader:
             mapping = config["mapping"]
             index_name = config["index_name"]
 
-        # Load JSON file
+        # Stream documents from the JSON (array or NDJSON) file
         print(f"\nLoading data from: {file_path}")
-        try:
-            with open(file_path) as f:
-                documents = json.load(f)
-            print(f"Loaded {len(documents)} documents from file")
-        except FileNotFoundError:
+        if not file_path.exists():
             print(f"Error: File not found: {file_path}")
             return False
-        except json.JSONDecodeError as e:
-            print(f"Error: Invalid JSON: {e}")
-            return False
+        documents = bulk.CountingIterator(bulk.iter_json_documents(file_path))
 
         # Create index
-        if not self.create_index(index_name, mapping):
+        alias = None
+        if alias_swap:
+            alias, index_name = index_name, bulk.versioned_index_name(index_name)
+            fast_load = True
+        if not self.create_index(index_name, mapping, delete_existing=not alias):
             return False
 
-        # Load documents
-        loaded = self.bulk_load(index_name, documents)
-
-        # Refresh index to make documents searchable
-        requests.post(
-            f"{self.base_url}/{index_name}/_refresh",
-            auth=self.auth,
-            verify=self.verify_ssl,
-        )
+        # A versioned index that never went live is deleted whatever happened,
+        # so it cannot later be mistaken for a rollback version
+        swapped = False
+        try:
+            restore = None
+            if fast_load:
+                restore = self.begin_fast_load(index_name, translog_async)
+
+            # Load documents
+            load_options = dict(
+                batch_bytes=batch_bytes,
+                concurrency=concurrency,
+                dead_letter_path=dead_letter_path,
+            )
+            loaded = None
+            healthy = True
+            try:
+                if use_async:
+                    loaded = asyncio.run(
+                        self.bulk_load_async(index_name, documents, **load_options)
+                    )
+                else:
+                    loaded = self.bulk_load(index_name, documents, **load_options)
+            except json.JSONDecodeError as e:
+                print(f"Error: Invalid JSON: {e}")
+            finally:
+                # A versioned index that will be discarded needs no restore
+                discard = alias and loaded != documents.count
+                if restore is not None and not discard:
+                    healthy = self.finish_fast_load(index_name, restore, force_merge)
+
+            # Refresh index to make documents searchable
+            if restore is None and loaded is not None:
+                self.client.post(f"{index_name}/_refresh", timeout=60)
+
+            if alias:
+                # Only a complete, healthy load may replace the live index
+                if not documents.count or loaded != documents.count or not healthy:
+                    if loaded is not None:
+                        print(
+                            f"Error: indexed {loaded} of {documents.count} documents"
+                            + ("" if healthy else f", '{index_name}' is not healthy")
+                            + f"; alias '{alias}' left unchanged"
+                        )
+                    return False
+                previous = self.swap_alias(alias, index_name)
+                if previous is None:
+                    return False
+                swapped = True
+                self.delete_old_versions(alias, index_name, keep_versions, previous)
+            elif loaded is None:
+                return False
+        finally:
+            if alias and not swapped:
+                self.discard_index(index_name)
 
         print(f"\nSuccessfully loaded {loaded} documents into '{index_name}'")
         return True
@@ -259,12 +724,10 @@ def detect_stack():
 
     for stack in stacks:
         try:
-            response = requests.get(
-                stack["url"],
-                auth=stack["auth"],
-                verify=stack["verify"],
-                timeout=5,
-            )
+            with es_client.ClusterClient(
+                stack["url"], stack["auth"], stack["verify"], timeout=5
+            ) as client:
+                response = client.get()
             if response.status_code in [200, 401]:
                 return stack
         except Exception:
@@ -288,6 +751,18 @@ Examples:
   # Load movies with pre-computed embeddings
   python data/load_data.py --dataset movies --with-embeddings
 
+  # Keep 4 bulk requests in flight for faster loads
+  python data/load_data.py --dataset movies --size full --concurrency 4
+
+  # Pipeline bulk requests over one pooled connection (needs aiohttp)
+  python data/load_data.py --dataset movies --size full --async --concurrency 4
+
+  # Large reload: no refreshes or replicas until the load is done
+  python data/load_data.py --dataset movies --size full --fast-load --force-merge
+
+  # Reload without downtime: fill a new index, then swap the alias to it
+  python data/load_data.py --dataset movies --size full --alias-swap
+
   # Specify custom Elasticsearch URL
   python data/load_data.py --dataset movies --url http://localhost:9200 --no-auth
         """,
@@ -309,6 +784,67 @@ Examples:
         action="store_true",
         help="Load dataset with pre-computed embeddings (for vector search)",
     )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=1,
+        help="Number of bulk requests kept in flight (default: 1)",
+    )
+    parser.add_argument(
+        "--batch-mb",
+        type=float,
+        default=bulk.DEFAULT_BATCH_BYTES / (1024 * 1024),
+        help="Initial bulk payload size in MB, adapted during the load (default: 5)",
+    )
+    parser.add_argument(
+        "--dead-letter",
+        default=None,
+        help="File for documents that fail permanently (default: <index>.dead-letter.ndjson)",
+    )
+    parser.add_argument(
+        "--async",
+        dest="use_async",
+        action="store_true",
+        help="Send bulk requests with asyncio over a pooled aiohttp session",
+    )
+    parser.add_argument(
+        "--fast-load",
+        action="store_true",
+        help="Disable refresh and replicas during the load, restore them afterwards",
+    )
+    parser.add_argument(
+        "--translog-async",
+        action="store_true",
+        help="With --fast-load, also fsync the translog asynchronously",
+    )
+    parser.add_argument(
+        "--force-merge",
+        action="store_true",
+        help="With --fast-load, force-merge to one segment before restoring replicas",
+    )
+    parser.add_argument(
+        "--alias-swap",
+        action="store_true",
+        help="Load into a new versioned index and atomically move the alias to it",
+    )
+    parser.add_argument(
+        "--keep-versions",
+        type=int,
+        default=1,
+        help="With --alias-swap, older index versions kept for rollback (default: 1)",
+    )
+    parser.add_argument(
+        "--pool-size",
+        type=int,
+        default=es_client.DEFAULT_POOL_SIZE,
+        help="Pooled connections kept open to the cluster, raised to at least "
+        f"--concurrency (default: {es_client.DEFAULT_POOL_SIZE})",
+    )
+    parser.add_argument(
+        "--no-keep-alive",
+        action="store_true",
+        help="Close the connection after every request instead of reusing it",
+    )
     parser.add_argument(
         "--url",
         default=None,
@@ -336,6 +872,9 @@ Examples:
     )
 
     args = parser.parse_args()
+    if args.use_async and aiohttp is None:
+        print("Error: --async requires aiohttp. Install with: pip install aiohttp")
+        sys.exit(1)
 
     # Determine connection settings
     if args.url:
@@ -358,12 +897,31 @@ Examples:
         verify = stack["verify"]
 
     # Create loader and verify connection
-    loader = DataLoader(base_url, auth, verify)
+    loader = DataLoader(
+        base_url,
+        auth,
+        verify,
+        pool_size=max(args.pool_size, args.concurrency),
+        keep_alive=not args.no_keep_alive,
+    )
     if not loader.check_connection():
         sys.exit(1)
 
     # Load the dataset
-    success = loader.load_dataset(args.dataset, args.size, args.with_embeddings)
+    success = loader.load_dataset(
+        args.dataset,
+        args.size,
+        args.with_embeddings,
+        concurrency=args.concurrency,
+        batch_bytes=int(args.batch_mb * 1024 * 1024),
+        dead_letter_path=args.dead_letter,
+        use_async=args.use_async,
+        fast_load=args.fast_load,
+        translog_async=args.translog_async,
+        force_merge=args.force_merge,
+        alias_swap=args.alias_swap,
+        keep_versions=args.keep_versions,
+    )
 
     if success:
         print("\nData loaded successfully!")
@@ -0,0 +1,615 @@
+#!/usr/bin/env python3
+"""
+Open-loop load generator for the course indices.
+
+Sends a weighted mix of searches against movies, movies-embeddings and
+movies_enriched at a fixed target rate. Requests are scheduled ahead of time
+and sent whether or not earlier ones have answered, so a slow cluster cannot
+slow the generator down and hide its own latency (coordinated omission).
+For every query type two histograms are kept:
+
+  latency        from the scheduled start of a request to its response
+  service time   from the moment it got a connection to its response
+
+Under load the two drift apart as requests queue. Percentiles are printed
+as a Rally-style markdown table (Lap | Metric | Task | Value | Unit) that
+benchmarks/compare.py can diff against other runs. Give several --rate values
+to trace a latency-vs-throughput curve, one lap per rate.
+
+Usage:
+    python data/loadgen.py --rate 50 --duration 60
+    python data/loadgen.py --rate 100 200 400 --mix match=3,term=2,knn=1
+    python data/loadgen.py --rate 2000 --processes 4 --output benchmarks/loadgen.rep
+
+Requirements:
+    pip install requests aiohttp
+"""
+
+import argparse
+import asyncio
+import csv
+import json
+import math
+import random
+import statistics
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from load_data import DataLoader, detect_stack
+
+try:
+    import aiohttp
+except ImportError:
+    print("Error: aiohttp required. Install with: pip install aiohttp")
+    sys.exit(1)
+
+# Query type -> index it runs against
+QUERIES = {
+    "match": "movies",
+    "term": "movies",
+    "range": "movies",
+    "agg": "movies",
+    "knn": "movies-embeddings",
+    "enriched_match": "movies_enriched",
+    "enriched_knn": "movies_enriched",
+}
+
+# Script that creates each index, for the missing-index hint
+LOADERS = {
+    "movies": "python data/load_data.py --dataset movies",
+    "movies-embeddings": "python data/load_data.py --dataset movies --with-embeddings",
+    "movies_enriched": "python data/index.py",
+}
+
+DEFAULT_MIX = "match=4,term=2,range=2,agg=1"
+PERCENTILES = [50, 90, 99, 99.9, 100]
+
+EMBEDDING_DIMS = {"knn": 384, "enriched_knn": 768}
+MATCH_WORDS = [
+    "love",
+    "war",
+    "family",
+    "space",
+    "murder",
+    "friend",
+    "city",
+    "secret",
+    "journey",
+    "school",
+    "father",
+    "island",
+]
+GENRES = [
+    "Drama",
+    "Comedy",
+    "Action",
+    "Thriller",
+    "Romance",
+    "Horror",
+    "Science Fiction",
+    "Adventure",
+    "Crime",
+    "Animation",
+]
+
+
+class Histogram:
+    """HDR-style histogram of durations with bounded relative error.
+
+    Values are recorded in whole microseconds. Each power-of-two range is
+    split into ``2 ** (sub_bucket_bits - 1)`` linear buckets, so any reported
+    value is within ``2 ** -(sub_bucket_bits - 1)`` (under 1% by default) of
+    what was recorded, whatever its magnitude, and memory stays a few hundred
+    counters. Histograms from several workers are combined with ``merge``.
+    """
+
+    def __init__(self, sub_bucket_bits: int = 8):
+        self.sub_bucket_bits = sub_bucket_bits
+        self.counts = Counter()
+        self.count = 0
+        self.min = math.inf
+        self.max = 0
+
+    def record(self, seconds: float) -> None:
+        value = max(1, round(seconds * 1_000_000))
+        shift = max(0, value.bit_length() - self.sub_bucket_bits)
+        self.counts[(shift, value >> shift)] += 1
+        self.count += 1
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+
+    def merge(self, other: "Histogram") -> None:
+        self.counts.update(other.counts)
+        self.count += other.count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    def percentile(self, pct: float) -> float:
+        """Nearest-rank percentile in milliseconds (highest value in its bucket)."""
+        if not self.count:
+            return math.nan
+        rank = max(1, math.ceil(pct / 100 * self.count))
+        seen = 0
+        for shift, sub_bucket in sorted(self.counts):
+            seen += self.counts[(shift, sub_bucket)]
+            if seen >= rank:
+                value = ((sub_bucket + 1) << shift) - 1
+                return min(max(value, self.min), self.max) / 1000
+        return self.max / 1000
+
+
+def parse_mix(spec: str) -> dict:
+    """Parse ``name=weight,...`` into a ``{query type: weight}`` dict."""
+    mix = {}
+    for part in spec.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in QUERIES:
+            raise ValueError(f"unknown query type '{name}'")
+        mix[name] = float(weight) if weight else 1.0
+        if mix[name] < 0:
+            raise ValueError(f"negative weight for '{name}'")
+    if not sum(mix.values()):
+        raise ValueError("query mix has no positive weights")
+    return mix
+
+
+def random_vector(rng: random.Random, dims: int) -> list:
+    vector = [rng.gauss(0, 1) for _ in range(dims)]
+    norm = math.sqrt(sum(v * v for v in vector)) or 1.0
+    return [v / norm for v in vector]
+
+
+def knn_query(field: str, vector: list, knn_style: str) -> dict:
+    if knn_style == "opensearch":
+        return {"size": 10, "query": {"knn": {field: {"vector": vector, "k": 10}}}}
+    return {
+        "knn": {"field": field, "query_vector": vector, "k": 10, "num_candidates": 100},
+        "_source": False,
+    }
+
+
+def query_body(task: str, rng: random.Random, knn_style: str) -> dict:
+    """Search body for one query of the mix."""
+    if task == "match":
+        return {"query": {"match": {"overview": " ".join(rng.sample(MATCH_WORDS, 2))}}}
+    if task == "term":
+        return {"query": {"term": {"genres": rng.choice(GENRES)}}}
+    if task == "range":
+        low = round(rng.uniform(0, 9), 1)
+        return {"query": {"range": {"vote_average": {"gte": low, "lt": low + 1}}}}
+    if task == "agg":
+        return {
+            "size": 0,
+            "aggs": {
+                "genres": {
+                    "terms": {"field": "genres", "size": 10},
+                    "aggs": {"avg_rating": {"avg": {"field": "vote_average"}}},
+                }
+            },
+        }
+    if task == "enriched_match":
+        words = " ".join(rng.sample(MATCH_WORDS, 2))
+        return {
+            "query": {
+                "multi_match": {
+                    "query": words,
+                    "fields": ["title^2", "description_en", "abstract_en"],
+                }
+            }
+        }
+    field = "overview_embedding" if task == "knn" else "description_en_embedding"
+    return knn_query(field, random_vector(rng, EMBEDDING_DIMS[task]), knn_style)
+
+
+class LapResult:
+    """Measurements of one worker for one target rate; picklable for merging."""
+
+    def __init__(self, mix):
+        self.latency = {task: Histogram() for task in mix}
+        self.service_time = {task: Histogram() for task in mix}
+        self.completed = {task: Counter() for task in mix}  # second -> responses
+        self.errors = Counter()
+        self.scheduled = 0
+        self.max_lag = 0.0
+
+    def merge(self, other: "LapResult") -> None:
+        for task in self.latency:
+            self.latency[task].merge(other.latency[task])
+            self.service_time[task].merge(other.service_time[task])
+            self.completed[task].update(other.completed[task])
+        self.errors.update(other.errors)
+        self.scheduled += other.scheduled
+        self.max_lag = max(self.max_lag, other.max_lag)
+
+
+async def run_lap(
+    target: dict,
+    mix: dict,
+    rate: float,
+    duration: float,
+    warmup: float,
+    connections: int,
+    timeout: float,
+    arrivals: str,
+    seed: int,
+    start_at: float,
+    phase: float = 0.0,
+) -> LapResult:
+    """Drive ``rate`` requests per second for ``warmup + duration`` seconds.
+
+    Request ``i`` is due at its scheduled offset from the start whatever
+    happened to earlier ones; only the connection pool (``connections``)
+    bounds what is on the wire, and time spent waiting for it counts as
+    latency but not as service time. Requests scheduled during the warmup
+    are sent but not measured. The first request is due ``phase`` seconds
+    after the start, so workers sharing a lap can interleave their arrivals.
+    """
+    rng = random.Random(seed)
+    tasks = list(mix)
+    weights = [mix[task] for task in tasks]
+    result = LapResult(mix)
+    slots = asyncio.Semaphore(connections)
+
+    auth = aiohttp.BasicAuth(*target["auth"]) if target["auth"] else None
+    connector = aiohttp.TCPConnector(
+        limit=connections, ssl=None if target["verify"] else False
+    )
+    session = aiohttp.ClientSession(
+        auth=auth,
+        connector=connector,
+        headers={"Content-Type": "application/json"},
+        timeout=aiohttp.ClientTimeout(total=timeout),
+    )
+
+    async def send(task: str, body: bytes, due: float) -> None:
+        async with slots:
+            sent = time.perf_counter()
+            try:
+                async with session.post(
+                    f"{target['url']}/{QUERIES[task]}/_search", data=body
+                ) as response:
+                    await response.read()
+                    ok = response.status < 400
+            except (aiohttp.ClientError, asyncio.TimeoutError):
+                ok = False
+        done = time.perf_counter()
+        if due - start < warmup:
+            return
+        if not ok:
+            result.errors[task] += 1
+            return
+        result.latency[task].record(done - due)
+        result.service_time[task].record(done - sent)
+        result.completed[task][int(done - start - warmup)] += 1
+
+    pending = set()
+    try:
+        await asyncio.sleep(max(0.0, start_at - time.time()))
+        start = time.perf_counter()
+        offset = phase
+        while offset < warmup + duration:
+            due = start + offset
+            lag = time.perf_counter() - due
+            await asyncio.sleep(max(0.0, -lag))
+            if offset >= warmup:
+                result.scheduled += 1
+                result.max_lag = max(result.max_lag, lag)
+            task = rng.choices(tasks, weights)[0]
+            body = json.dumps(query_body(task, rng, target["knn_style"])).encode()
+            request = asyncio.create_task(send(task, body, due))
+            pending.add(request)
+            request.add_done_callback(pending.discard)
+            offset += rng.expovariate(rate) if arrivals == "poisson" else 1 / rate
+        if pending:
+            await asyncio.wait(pending)
+    finally:
+        await session.close()
+    return result
+
+
+def run_worker(kwargs: dict) -> LapResult:
+    """Process pool entry point: one worker's share of a lap."""
+    return asyncio.run(run_lap(**kwargs))
+
+
+def run_rate(target, mix, rate, args, executor) -> LapResult:
+    """Run one lap at ``rate``, split evenly over ``args.processes`` workers."""
+    start_at = time.time() + 0.5
+    jobs = [
+        {
+            "target": target,
+            "mix": mix,
+            "rate": rate / args.processes,
+            "duration": args.duration,
+            "warmup": args.warmup,
+            "connections": args.connections,
+            "timeout": args.timeout,
+            "arrivals": args.arrivals,
+            "seed": args.seed + worker,
+            "start_at": start_at,
+            # Offset each worker by one aggregate interval, so their fixed
+            # schedules interleave instead of all firing together
+            "phase": worker / rate,
+        }
+        for worker in range(args.processes)
+    ]
+    if executor is None:
+        return run_worker(jobs[0])
+    results = list(executor.map(run_worker, jobs))
+    for other in results[1:]:
+        results[0].merge(other)
+    return results[0]
+
+
+def lap_metrics(lap: str, result: LapResult, duration: float) -> list:
+    """Rally-style ``(lap, metric, task, value, unit)`` rows for one lap."""
+    rows = []
+    seconds = max(1, int(duration))
+    for task in result.latency:
+        rates = sorted(result.completed[task][second] for second in range(seconds))
+        rows += [
+            (lap, "Min Throughput", task, rates[0], "ops/s"),
+            (lap, "Median Throughput", task, statistics.median(rates), "ops/s"),
+            (lap, "Max Throughput", task, rates[-1], "ops/s"),
+        ]
+        for kind, histograms in (
+            ("latency", result.latency),
+            ("service time", result.service_time),
+        ):
+            for pct in PERCENTILES:
+                rows.append(
+                    (
+                        lap,
+                        f"{pct:g}th percentile {kind}",
+                        task,
+                        histograms[task].percentile(pct),
+                        "ms",
+                    )
+                )
+        errors = result.errors[task]
+        total = errors + result.latency[task].count
+        rows.append(
+            (lap, "error rate", task, 100 * errors / total if total else 0, "%")
+        )
+    return rows
+
+
+def format_value(value) -> str:
+    return "" if isinstance(value, float) and math.isnan(value) else f"{value:g}"
+
+
+def format_report(rows: list) -> str:
+    """Markdown table laid out like the .rep files in benchmarks/."""
+    header = ("Lap", "Metric", "Task", "Value", "Unit")
+    table = [header] + [
+        (str(lap), metric, task, format_value(value), unit)
+        for lap, metric, task, value, unit in rows
+    ]
+    widths = [max(len(row[i]) for row in table) + 2 for i in range(len(header))]
+    lines = [
+        "|" + "|".join(cell.rjust(w) + " " for cell, w in zip(header, widths)) + "|"
+    ]
+    lines.append("|" + "|".join("-" * w + ":" for w in widths) + "|")
+    for row in table[1:]:
+        lines.append(
+            "|" + "|".join(cell.rjust(w) + " " for cell, w in zip(row, widths)) + "|"
+        )
+    return "\n".join(lines)
+
+
+def write_report(path: str, rows: list) -> None:
+    """Write ``rows`` as Rally CSV (``.csv``) or as a markdown report."""
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    if path.endswith(".csv"):
+        with open(path, "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(["Lap", "Metric", "Task", "Value", "Unit"])
+            for lap, metric, task, value, unit in rows:
+                writer.writerow([lap, metric, task, format_value(value), unit])
+    else:
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(format_report(rows) + "\n")
+    print(f"Report written to {path}")
+
+
+def missing_indices(loader: DataLoader, mix: dict) -> list:
+    """Indices used by ``mix`` that do not exist on the cluster."""
+    missing = []
+    for index in sorted({QUERIES[task] for task in mix}):
+        if loader.client.head(index).status_code == 404:
+            missing.append(index)
+    return missing
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Open-loop search load generator for the course indices",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog=f"""
+Query types: {", ".join(f"{task} ({index})" for task, index in QUERIES.items())}
+
+Examples:
+  # 50 searches per second for a minute, default movies mix
+  python data/loadgen.py --rate 50 --duration 60
+
+  # Latency-vs-throughput curve, including kNN on movies-embeddings
+  python data/loadgen.py --rate 100 200 400 800 --mix match=3,term=2,knn=1
+
+  # Higher rates than one event loop can schedule, saved for compare.py
+  python data/loadgen.py --rate 2000 --processes 4 --output benchmarks/loadgen.rep
+        """,
+    )
+    parser.add_argument(
+        "--rate",
+        type=float,
+        nargs="+",
+        default=[20.0],
+        help="Target requests per second; several values run one lap each (default: 20)",
+    )
+    parser.add_argument(
+        "--duration",
+        type=float,
+        default=30.0,
+        help="Measured seconds per lap (default: 30)",
+    )
+    parser.add_argument(
+        "--warmup",
+        type=float,
+        default=5.0,
+        help="Unmeasured seconds at the start of each lap (default: 5)",
+    )
+    parser.add_argument(
+        "--mix",
+        default=DEFAULT_MIX,
+        help=f"Query types and weights, name=weight,... (default: {DEFAULT_MIX})",
+    )
+    parser.add_argument(
+        "--arrivals",
+        choices=["fixed", "poisson"],
+        default="fixed",
+        help="Evenly spaced or Poisson-distributed request times (default: fixed)",
+    )
+    parser.add_argument(
+        "--processes",
+        type=int,
+        default=1,
+        help="Worker processes, each with its own event loop (default: 1)",
+    )
+    parser.add_argument(
+        "--connections",
+        type=int,
+        default=64,
+        help="Connections per worker; requests beyond this queue (default: 64)",
+    )
+    parser.add_argument(
+        "--timeout",
+        type=float,
+        default=10.0,
+        help="Seconds before a request counts as an error (default: 10)",
+    )
+    parser.add_argument(
+        "--seed",
+        type=int,
+        default=42,
+        help="Random seed for query parameters and arrivals (default: 42)",
+    )
+    parser.add_argument(
+        "--output",
+        default=None,
+        help="Also write the results to this file (.csv for Rally CSV, else markdown)",
+    )
+    parser.add_argument(
+        "--url",
+        default=None,
+        help="Elasticsearch URL (auto-detected if not specified)",
+    )
+    parser.add_argument(
+        "--user",
+        default=None,
+        help="Elasticsearch username",
+    )
+    parser.add_argument(
+        "--password",
+        default=None,
+        help="Elasticsearch password",
+    )
+    parser.add_argument(
+        "--no-auth",
+        action="store_true",
+        help="Connect without authentication",
+    )
+    parser.add_argument(
+        "--insecure",
+        action="store_true",
+        help="Skip SSL verification",
+    )
+
+    args = parser.parse_args()
+    try:
+        mix = parse_mix(args.mix)
+    except ValueError as e:
+        print(f"Error: invalid --mix: {e}")
+        sys.exit(1)
+    if min(args.rate) <= 0 or args.duration <= 0 or args.processes < 1:
+        print("Error: --rate, --duration and --processes must be positive")
+        sys.exit(1)
+
+    # Determine connection settings
+    if args.url:
+        base_url = args.url
+        auth = (args.user, args.password) if args.user and args.password else None
+        if args.no_auth:
+            auth = None
+        verify = not args.insecure
+    else:
+        # Auto-detect running stack
+        print("Auto-detecting Elasticsearch stack...")
+        stack = detect_stack()
+        if not stack:
+            print("Error: No Elasticsearch stack detected.")
+            print("Please start one of the stacks or specify --url manually.")
+            sys.exit(1)
+        print(f"Detected: {stack['name']}")
+        base_url = stack["url"]
+        auth = stack["auth"]
+        verify = stack["verify"]
+
+    loader = DataLoader(base_url, auth, verify)
+    if not loader.check_connection():
+        sys.exit(1)
+    missing = missing_indices(loader, mix)
+    if missing:
+        for index in missing:
+            print(f"Error: index '{index}' not found. Load it with: {LOADERS[index]}")
+        sys.exit(1)
+    distribution = loader.client.get().json().get("version", {}).get("distribution")
+    loader.client.close()
+
+    target = {
+        "url": loader.base_url,
+        "auth": auth,
+        "verify": verify,
+        "knn_style": "opensearch" if distribution == "opensearch" else "elastic",
+    }
+    print(
+        f"Query mix: {', '.join(f'{task}={weight:g}' for task, weight in mix.items())}"
+    )
+
+    rows = []
+    executor = ProcessPoolExecutor(args.processes) if args.processes > 1 else None
+    try:
+        for lap, rate in enumerate(args.rate, 1):
+            label = "All" if len(args.rate) == 1 else str(lap)
+            print(
+                f"\nLap {lap}: {rate:g} req/s for {args.duration:g}s "
+                f"(+{args.warmup:g}s warmup)..."
+            )
+            result = run_rate(target, mix, rate, args, executor)
+            achieved = result.scheduled / args.duration
+            print(f"  Scheduled {result.scheduled} requests ({achieved:.1f} req/s)")
+            if result.max_lag > 0.05:
+                print(
+                    f"  Warning: the generator fell up to {result.max_lag * 1000:.0f} ms "
+                    "behind schedule; add --processes for this rate"
+                )
+            rows += lap_metrics(label, result, args.duration)
+    except KeyboardInterrupt:
+        print("\nInterrupted")
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+    if not rows:
+        sys.exit(1)
+    print()
+    print(format_report(rows))
+    if args.output:
+        write_report(args.output, rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+"""
+Local mock of an OpenAI-compatible chat completions endpoint.
+
+Answers the prompts sent by generate_descriptions.py (single-movie and
+--movies-per-request) with placeholder text, so the enrichment pipeline can be
+benchmarked and regression-tested offline. Faults are injected at random:
+
+  --latency / --jitter   Mean and spread of response time, in seconds
+  --rate-limit P         Return 429 with Retry-After for a fraction P of requests
+  --max-inflight N       Also return 429 whenever more than N requests are open
+  --malformed P          Return a body that is not valid JSON
+  --bad-content P        Return valid JSON whose message content is not
+  --timeout P            Hang for --hang seconds so the client times out
+
+GET /stats reports request, fault and peak in-flight counts; POST /stats/reset
+clears them between benchmark runs.
+
+Usage:
+    python data/mock_llm_server.py --port 8099 --latency 0.2 --rate-limit 0.05
+    python data/generate_descriptions.py \\
+        --endpoint http://127.0.0.1:8099/v1/chat/completions
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import re
+import sys
+
+try:
+    from aiohttp import web
+except ImportError:
+    print("Error: aiohttp required. Install with: pip install aiohttp")
+    sys.exit(1)
+
+
+FIELDS = [
+    "abstract_en",
+    "abstract_kk",
+    "abstract_fr",
+    "description_en",
+    "description_kk",
+    "description_fr",
+]
+
+MOVIE_ID = re.compile(r"^movieId: (.+)$", re.MULTILINE)
+TITLE = re.compile(r"^Title: (.*)$", re.MULTILINE)
+TOKENS_PER_MOVIE = 600
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Mock LLM chat completions server")
+    parser.add_argument("--host", default="127.0.0.1", help="Bind address")
+    parser.add_argument("--port", type=int, default=8099, help="Port (default: 8099)")
+    parser.add_argument(
+        "--latency",
+        type=float,
+        default=0.5,
+        help="Mean response time in seconds (default: 0.5)",
+    )
+    parser.add_argument(
+        "--jitter",
+        type=float,
+        default=0.5,
+        help="Response time varies by +/- this fraction of --latency (default: 0.5)",
+    )
+    parser.add_argument(
+        "--rate-limit",
+        type=float,
+        default=0.0,
+        help="Fraction of requests answered with 429 (default: 0)",
+    )
+    parser.add_argument(
+        "--retry-after",
+        type=float,
+        default=1.0,
+        help="Retry-After seconds sent with 429s (default: 1)",
+    )
+    parser.add_argument(
+        "--max-inflight",
+        type=int,
+        default=0,
+        help="Return 429 above this many open requests, 0=unlimited (default: 0)",
+    )
+    parser.add_argument(
+        "--malformed",
+        type=float,
+        default=0.0,
+        help="Fraction of responses with a body that is not JSON (default: 0)",
+    )
+    parser.add_argument(
+        "--bad-content",
+        type=float,
+        default=0.0,
+        help="Fraction of responses whose message content is not JSON (default: 0)",
+    )
+    parser.add_argument(
+        "--timeout",
+        type=float,
+        default=0.0,
+        help="Fraction of requests that hang for --hang seconds (default: 0)",
+    )
+    parser.add_argument(
+        "--hang",
+        type=float,
+        default=60.0,
+        help="How long a timed-out request hangs, in seconds (default: 60)",
+    )
+    parser.add_argument(
+        "--seed", type=int, default=None, help="Random seed for repeatable faults"
+    )
+    return parser.parse_args()
+
+
+def movie_fields(title):
+    """Placeholder descriptions for one movie."""
+    return {f: f"{f.replace('_', ' ').capitalize()} of {title}." for f in FIELDS}
+
+
+def completion_content(prompt):
+    """Build the reply the real model would give for a prompt.
+
+    Prompts that list ``movieId:`` lines get a JSON array keyed by movieId,
+    single-movie prompts get one JSON object.
+    """
+    titles = TITLE.findall(prompt)
+    ids = MOVIE_ID.findall(prompt)
+    if ids:
+        return json.dumps(
+            [
+                {"movieId": movie_id, **movie_fields(title)}
+                for movie_id, title in zip(ids, titles)
+            ],
+            ensure_ascii=False,
+        )
+    return json.dumps(movie_fields(titles[0] if titles else ""), ensure_ascii=False)
+
+
+class MockLLM:
+    """Request handlers plus the counters reported by /stats."""
+
+    def __init__(self, args):
+        self.args = args
+        self.inflight = 0
+        self.reset()
+
+    def reset(self):
+        self.stats = {
+            "requests": 0,
+            "completed": 0,
+            "rate_limited": 0,
+            "malformed": 0,
+            "bad_content": 0,
+            "timeouts": 0,
+            "max_inflight": 0,
+        }
+
+    def delay(self):
+        spread = self.args.latency * self.args.jitter
+        return max(0.0, random.uniform(-spread, spread) + self.args.latency)
+
+    async def chat(self, request):
+        args = self.args
+        stats = self.stats
+        stats["requests"] += 1
+        self.inflight += 1
+        stats["max_inflight"] = max(stats["max_inflight"], self.inflight)
+        try:
+            try:
+                body = await request.json()
+                prompt = body["messages"][-1]["content"]
+            except (ValueError, KeyError, IndexError, TypeError):
+                return web.json_response(
+                    {"error": {"message": "invalid request body"}}, status=400
+                )
+
+            over_limit = args.max_inflight and self.inflight > args.max_inflight
+            if over_limit or random.random() < args.rate_limit:
+                stats["rate_limited"] += 1
+                return web.json_response(
+                    {"error": {"message": "Rate limit exceeded"}},
+                    status=429,
+                    headers={"Retry-After": f"{args.retry_after:g}"},
+                )
+            if random.random() < args.timeout:
+                stats["timeouts"] += 1
+                await asyncio.sleep(args.hang)
+
+            await asyncio.sleep(self.delay())
+
+            if random.random() < args.malformed:
+                stats["malformed"] += 1
+                return web.Response(
+                    text='{"choices": [{"message": ', content_type="application/json"
+                )
+            if random.random() < args.bad_content:
+                stats["bad_content"] += 1
+                content = "Sorry, I can't help with that."
+            else:
+                content = completion_content(prompt)
+
+            stats["completed"] += 1
+            movies = max(1, len(MOVIE_ID.findall(prompt)))
+            return web.json_response(
+                {
+                    "choices": [{"message": {"role": "assistant", "content": content}}],
+                    "usage": {"total_tokens": TOKENS_PER_MOVIE * movies},
+                }
+            )
+        finally:
+            self.inflight -= 1
+
+    async def get_stats(self, request):
+        return web.json_response({**self.stats, "inflight": self.inflight})
+
+    async def reset_stats(self, request):
+        self.reset()
+        return web.json_response({"ok": True})
+
+
+def main():
+    args = parse_args()
+    if args.seed is not None:
+        random.seed(args.seed)
+
+    mock = MockLLM(args)
+    app = web.Application()
+    app.router.add_post("/v1/chat/completions", mock.chat)
+    app.router.add_post("/api/v1/chat/completions", mock.chat)
+    app.router.add_get("/stats", mock.get_stats)
+    app.router.add_post("/stats/reset", mock.reset_stats)
+
+    print(f"Mock LLM listening on http://{args.host}:{args.port}/v1/chat/completions")
+    web.run_app(app, host=args.host, port=args.port, print=None)
+
+
+if __name__ == "__main__":
+    main()
@@ -8,12 +8,31 @@ This script validates that all three stacks (Elastic, OpenSearch, ELK-OSS) can:
 3. Create indices
 4. Index and search documents
 5. Serve UI (Kibana/Dashboards)
+
+With --parallel N, several stacks are validated at once, each in its own
+validate.py subprocess with its own compose project name and host ports
+(shifted by PORT_STRIDE per slot). Stacks only start while their estimated
+memory fits in --memory-budget, and per-stack timings are reported.
+
+With --benchmark, each stack also bulk-loads a synthetic dataset and runs a
+fixed mix of term, match, range, aggregation and kNN queries for
+--benchmark-duration seconds. Throughput and latency percentiles are written
+to <benchmark-dir>/<stack>-validate.csv in the Lap,Metric,Task,Value,Unit
+shape of the Rally results in benchmarks/.
 """
 
 import argparse
+import csv
+import itertools
+import json
+import math
+import os
+import random
+import statistics
 import subprocess
 import sys
 import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from typing import Dict, Tuple
 
 try:
@@ -25,22 +44,161 @@ except ImportError:
     print("Error: requests library not found. Install with: pip install requests")
     sys.exit(1)
 
+from data import es_client
+
+# Host ports published by the compose files (overridable via the environment)
+BASE_PORTS = {
+    "ES_PORT": 9200,
+    "ES_NODE2_PORT": 9201,
+    "PERF_ANALYZER_PORT": 9600,
+    "KIBANA_PORT": 5601,
+}
+PORT_STRIDE = 10
+
+BENCHMARK_INDEX = "benchmark-validation-index"
+BENCHMARK_DIMS = 16
+BENCHMARK_BATCH = 1000
+# Relative weight of each query in the benchmark mix
+BENCHMARK_MIX = {"term": 3, "match": 3, "range": 2, "agg": 1, "knn": 1}
+BENCHMARK_WORDS = (
+    "search engine index shard replica cluster node query vector token "
+    "analyzer mapping field document segment merge refresh score filter "
+    "bucket aggregation latency throughput heap cache"
+).split()
+BENCHMARK_CATEGORIES = [f"category-{i:02d}" for i in range(20)]
+PERCENTILES = [50, 90, 99, 100]
+
+
+def percentile(sorted_values: list, pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    rank = max(1, math.ceil(pct / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def synthetic_document(rng: random.Random, doc_id: int) -> dict:
+    """One benchmark document with text, keyword, numeric, date and vector fields."""
+    vector = [rng.gauss(0, 1) for _ in range(BENCHMARK_DIMS)]
+    norm = math.sqrt(sum(v * v for v in vector)) or 1.0
+    return {
+        "id": doc_id,
+        "title": " ".join(rng.choices(BENCHMARK_WORDS, k=6)),
+        "category": rng.choice(BENCHMARK_CATEGORIES),
+        "price": round(rng.uniform(1, 1000), 2),
+        "day": f"2024-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+        "embedding": [round(v / norm, 6) for v in vector],
+    }
+
+
+def task_metrics(
+    task: str, rates: list, latencies: list, errors: int, unit: str
+) -> list:
+    """Rally-style throughput, latency and error rate rows for one task.
+
+    ``rates`` are throughput samples in ``unit``, ``latencies`` are request
+    durations in seconds.
+    """
+    rates = sorted(rates)
+    latencies = sorted(latency * 1000 for latency in latencies)
+    rows = [
+        ("Min Throughput", task, rates[0], unit),
+        ("Median Throughput", task, statistics.median(rates), unit),
+        ("Max Throughput", task, rates[-1], unit),
+    ]
+    # Closed-loop clients: latency and service time are the same measurement
+    for kind in ("latency", "service time"):
+        for pct in PERCENTILES:
+            rows.append(
+                (f"{pct}th percentile {kind}", task, percentile(latencies, pct), "ms")
+            )
+    rows.append(("error rate", task, 100 * errors / len(latencies), "%"))
+    return rows
+
+
+def write_benchmark_csv(path: str, rows: list) -> None:
+    """Write ``(metric, task, value, unit)`` rows in Rally's CSV layout."""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["Lap", "Metric", "Task", "Value", "Unit"])
+        for metric, task, value, unit in rows:
+            writer.writerow(["All", metric, task, value, unit])
+
+
+def backoff_intervals(first: float = 0.005, cap: float = 5.0):
+    """Yield sleep intervals that double from ``first`` up to ``cap`` seconds."""
+    interval = first
+    while True:
+        yield interval
+        interval = min(cap, interval * 2)
+
 
 class StackValidator:
     """Base class for stack validation."""
 
-    def __init__(self, name: str, compose_file: str):
+    # Rough host memory the stack needs while running, in GB
+    memory_gb = 2
+    # kNN flavour for the benchmark: "elastic", "opensearch" or None (no kNN)
+    knn_style = "elastic"
+
+    def __init__(self, name: str, compose_file: str, scheme: str = "http"):
         self.name = name
         self.compose_file = compose_file
-        self.base_url = None
+        self.scheme = scheme
+        self.port_offset = 0
+        self.project = None
         self.auth = None
         self.verify_ssl = True
+        self.pool_size = es_client.DEFAULT_POOL_SIZE
+        self.keep_alive = True
+        self._client = None
+        # Keyword arguments for run_benchmark, or None to skip the benchmark
+        self.benchmark_options = None
+
+    @property
+    def ports(self) -> Dict[str, int]:
+        """Host ports for this run, shifted by ``port_offset``."""
+        return {name: port + self.port_offset for name, port in BASE_PORTS.items()}
+
+    @property
+    def base_url(self) -> str:
+        return f"{self.scheme}://localhost:{self.ports['ES_PORT']}"
+
+    @property
+    def ui_url(self) -> str:
+        return f"http://localhost:{self.ports['KIBANA_PORT']}"
+
+    def compose_command(self, *args: str) -> list:
+        """``docker compose`` command for this stack's project."""
+        cmd = ["docker", "compose"]
+        if self.project:
+            cmd += ["-p", self.project]
+        return cmd + ["-f", self.compose_file, "--env-file", ".env", *args]
+
+    @property
+    def client(self) -> es_client.ClusterClient:
+        """Pooled client for this stack, created on first use."""
+        if self._client is None:
+            self._client = es_client.ClusterClient(
+                self.base_url,
+                self.auth,
+                self.verify_ssl,
+                pool_size=self.pool_size,
+                keep_alive=self.keep_alive,
+            )
+        return self._client
+
+    def close_client(self) -> None:
+        """Drop pooled connections, e.g. before the stack goes away."""
+        if self._client is not None:
+            self._client.close()
+            self._client = None
 
     def run_command(self, cmd: list, check: bool = True) -> Tuple[int, str]:
         """Run a shell command and return exit code and output."""
+        env = dict(os.environ, **{k: str(v) for k, v in self.ports.items()})
         try:
             result = subprocess.run(
-                cmd, capture_output=True, text=True, check=check, timeout=300
+                cmd, capture_output=True, text=True, check=check, timeout=300, env=env
             )
             return result.returncode, result.stdout + result.stderr
         except subprocess.CalledProcessError as e:
@@ -54,17 +212,7 @@ class StackValidator:
         print(f"Starting {self.name}...")
         print(f"{'=' * 60}")
 
-        cmd = [
-            "docker",
-            "compose",
-            "-f",
-            self.compose_file,
-            "--env-file",
-            ".env",
-            "up",
-            "-d",
-        ]
-        exit_code, output = self.run_command(cmd)
+        exit_code, output = self.run_command(self.compose_command("up", "-d"))
 
         if exit_code != 0:
             print(f"❌ Failed to start {self.name}")
@@ -77,58 +225,89 @@ class StackValidator:
     def stop_stack(self, cleanup: bool = True) -> None:
         """Stop the docker-compose stack."""
         print(f"\nStopping {self.name}...")
-        flag = "-v" if cleanup else ""
-        cmd = ["docker", "compose", "-f", self.compose_file, "down"]
-        if flag:
-            cmd.append(flag)
+        self.close_client()
+        cmd = self.compose_command("down")
+        if cleanup:
+            cmd.append("-v")
         self.run_command(cmd, check=False)
         print(f"✅ {self.name} stopped")
 
-    def wait_for_service(self, url: str, timeout: int = 180, interval: int = 5) -> bool:
-        """Wait for a service to respond."""
+    def wait_for_service(
+        self, url: str, timeout: int = 180, max_interval: float = 5.0
+    ) -> bool:
+        """Wait for a service to respond.
+
+        Polls start a few milliseconds apart and back off exponentially to
+        ``max_interval``, so a service that is already up is noticed at once.
+        """
         print(f"Waiting for service at {url}...")
-        start_time = time.time()
+        start_time = time.monotonic()
+        last_report = 0
 
-        while time.time() - start_time < timeout:
+        for interval in backoff_intervals(cap=max_interval):
             try:
-                response = requests.get(
-                    url, auth=self.auth, verify=self.verify_ssl, timeout=5
-                )
+                response = self.client.get(url, timeout=5)
                 if response.status_code in [200, 401]:
-                    print("✅ Service is responding")
+                    elapsed = time.monotonic() - start_time
+                    print(f"✅ Service is responding (after {elapsed:.1f}s)")
                     return True
             except requests.exceptions.RequestException:
                 pass
 
+            elapsed = time.monotonic() - start_time
+            if elapsed + interval >= timeout:
+                break
             time.sleep(interval)
-            elapsed = int(time.time() - start_time)
-            print(f"   Still waiting... ({elapsed}s/{timeout}s)")
+            if elapsed - last_report >= 10:
+                last_report = elapsed
+                print(f"   Still waiting... ({int(elapsed)}s/{timeout}s)")
 
         print(f"❌ Service did not respond within {timeout}s")
         return False
 
-    def check_health(self) -> bool:
-        """Check cluster health."""
-        print(f"\nChecking {self.name} cluster health...")
-        url = f"{self.base_url}/_cluster/health"
+    def check_health(self, status: str = "yellow", timeout: int = 120) -> bool:
+        """Wait until the cluster reaches ``status``, then report its health.
 
-        try:
-            response = requests.get(
-                url, auth=self.auth, verify=self.verify_ssl, timeout=10
-            )
-            if response.status_code == 200:
-                health = response.json()
-                status = health.get("status", "unknown")
-                print(f"✅ Cluster health: {status}")
-                print(f"   Cluster name: {health.get('cluster_name')}")
-                print(f"   Number of nodes: {health.get('number_of_nodes')}")
-                return True
-            else:
-                print(f"❌ Health check failed: {response.status_code}")
-                return False
-        except Exception as e:
-            print(f"❌ Health check error: {e}")
+        Uses ``_cluster/health?wait_for_status=`` long-polls, so the call
+        returns as soon as the cluster gets there rather than on a fixed
+        polling interval. Errors while security or shards are still coming
+        up are retried with backoff until ``timeout``.
+        """
+        print(f"\nChecking {self.name} cluster health...")
+        deadline = time.monotonic() + timeout
+        health = None
+        error = None
+
+        for interval in backoff_intervals():
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            poll = max(1, int(min(remaining, 30)))
+            try:
+                response = self.client.get(
+                    "_cluster/health",
+                    params={"wait_for_status": status, "timeout": f"{poll}s"},
+                    timeout=poll + 10,
+                )
+                # 408 means the long-poll timed out before reaching the status
+                if response.status_code in [200, 408]:
+                    health = response.json()
+                    if not health.get("timed_out"):
+                        break
+                    continue
+                error = f"status {response.status_code}"
+            except (requests.exceptions.RequestException, ValueError) as e:
+                error = e
+            time.sleep(min(interval, max(0, deadline - time.monotonic())))
+
+        if health is None or health.get("timed_out"):
+            current = health.get("status") if health else error
+            print(f"❌ Cluster did not reach {status} within {timeout}s ({current})")
             return False
+        print(f"✅ Cluster health: {health.get('status', 'unknown')}")
+        print(f"   Cluster name: {health.get('cluster_name')}")
+        print(f"   Number of nodes: {health.get('number_of_nodes')}")
+        return True
 
     def test_index_operations(self) -> bool:
         """Test index creation, document insertion, and search."""
@@ -138,9 +317,7 @@ class StackValidator:
         # Create index
         try:
             url = f"{self.base_url}/{index_name}"
-            response = requests.put(
-                url, auth=self.auth, verify=self.verify_ssl, timeout=10
-            )
+            response = self.client.put(url, timeout=10)
             if response.status_code not in [200, 201]:
                 print(f"❌ Failed to create index: {response.status_code}")
                 return False
@@ -151,17 +328,16 @@ class StackValidator:
 
         # Add document
         try:
-            url = f"{self.base_url}/{index_name}/_doc/1"
+            # refresh=wait_for returns once the document is searchable
+            url = f"{self.base_url}/{index_name}/_doc/1?refresh=wait_for"
             doc = {
                 "title": "Validation Test",
                 "description": "Testing flavours-of-elastic",
                 "timestamp": "2025-01-15",
             }
-            response = requests.post(
+            response = self.client.post(
                 url,
                 json=doc,
-                auth=self.auth,
-                verify=self.verify_ssl,
                 timeout=10,
                 headers={"Content-Type": "application/json"},
             )
@@ -173,15 +349,10 @@ class StackValidator:
             print(f"❌ Document insertion error: {e}")
             return False
 
-        # Wait for indexing
-        time.sleep(2)
-
         # Search
         try:
             url = f"{self.base_url}/{index_name}/_search?q=Validation"
-            response = requests.get(
-                url, auth=self.auth, verify=self.verify_ssl, timeout=10
-            )
+            response = self.client.get(url, timeout=10)
             if response.status_code != 200:
                 print(f"❌ Search failed: {response.status_code}")
                 return False
@@ -216,6 +387,213 @@ class StackValidator:
             print(f"⚠️  {ui_name} check error: {e}")
             return False
 
+    def benchmark_index_body(self) -> dict:
+        """Settings and mappings for the synthetic benchmark index."""
+        properties = {
+            "id": {"type": "integer"},
+            "title": {"type": "text"},
+            "category": {"type": "keyword"},
+            "price": {"type": "float"},
+            "day": {"type": "date"},
+        }
+        body = {"settings": {"number_of_replicas": 0}}
+        if self.knn_style == "elastic":
+            properties["embedding"] = {
+                "type": "dense_vector",
+                "dims": BENCHMARK_DIMS,
+                "index": True,
+                "similarity": "cosine",
+            }
+        elif self.knn_style == "opensearch":
+            body["settings"]["index.knn"] = True
+            properties["embedding"] = {
+                "type": "knn_vector",
+                "dimension": BENCHMARK_DIMS,
+            }
+        else:
+            properties["embedding"] = {"type": "float", "index": False}
+        body["mappings"] = {"properties": properties}
+        return body
+
+    def benchmark_query(self, task: str, rng: random.Random) -> dict:
+        """Search body for one query of the benchmark mix."""
+        if task == "term":
+            return {"query": {"term": {"category": rng.choice(BENCHMARK_CATEGORIES)}}}
+        if task == "match":
+            words = " ".join(rng.choices(BENCHMARK_WORDS, k=2))
+            return {"query": {"match": {"title": words}}}
+        if task == "range":
+            low = rng.uniform(1, 900)
+            return {"query": {"range": {"price": {"gte": low, "lt": low + 100}}}}
+        if task == "agg":
+            return {
+                "size": 0,
+                "aggs": {
+                    "categories": {
+                        "terms": {"field": "category", "size": 20},
+                        "aggs": {"avg_price": {"avg": {"field": "price"}}},
+                    }
+                },
+            }
+        vector = [rng.gauss(0, 1) for _ in range(BENCHMARK_DIMS)]
+        if self.knn_style == "opensearch":
+            return {
+                "size": 10,
+                "query": {"knn": {"embedding": {"vector": vector, "k": 10}}},
+            }
+        return {
+            "knn": {
+                "field": "embedding",
+                "query_vector": vector,
+                "k": 10,
+                "num_candidates": 50,
+            },
+            "_source": False,
+        }
+
+    def benchmark_load(self, num_docs: int) -> list:
+        """Bulk-load the synthetic dataset; return ``(task, value, unit)`` results."""
+        rng = random.Random(42)
+        samples = []  # (docs per second, seconds) per bulk request
+        errors = 0
+        for first in range(0, num_docs, BENCHMARK_BATCH):
+            lines = []
+            for doc_id in range(first, min(first + BENCHMARK_BATCH, num_docs)):
+                lines.append(json.dumps({"index": {"_id": doc_id}}))
+                lines.append(json.dumps(synthetic_document(rng, doc_id)))
+            start = time.perf_counter()
+            response = self.client.post(
+                f"{BENCHMARK_INDEX}/_bulk",
+                data="\n".join(lines) + "\n",
+                timeout=120,
+                headers={"Content-Type": "application/x-ndjson"},
+            )
+            elapsed = time.perf_counter() - start
+            if response.status_code != 200 or response.json().get("errors"):
+                errors += 1
+            samples.append((len(lines) // 2 / elapsed, elapsed))
+        self.client.post(f"{BENCHMARK_INDEX}/_refresh", timeout=120)
+        return task_metrics(
+            "index-append",
+            [rate for rate, _ in samples],
+            [elapsed for _, elapsed in samples],
+            errors,
+            "docs/s",
+        )
+
+    def benchmark_queries(self, duration: float, clients: int) -> list:
+        """Run the query mix from ``clients`` threads for ``duration`` seconds.
+
+        Each client sends its next query as soon as the previous one returns,
+        so latency equals service time. The first 10% of the run (at most 5s)
+        is warmup and not measured.
+        """
+        tasks = [task for task, weight in BENCHMARK_MIX.items() for _ in range(weight)]
+        if not self.knn_style:
+            tasks = [task for task in tasks if task != "knn"]
+        start = time.perf_counter()
+        warmup_end = start + min(5.0, duration * 0.1)
+        deadline = start + duration
+        samples = []  # (task, finished at, seconds, ok)
+
+        def run_client(client_id: int) -> None:
+            rng = random.Random(client_id)
+            schedule = itertools.islice(itertools.cycle(tasks), client_id, None)
+            for task in schedule:
+                if time.perf_counter() >= deadline:
+                    return
+                body = self.benchmark_query(task, rng)
+                sent = time.perf_counter()
+                try:
+                    response = self.client.post(
+                        f"{BENCHMARK_INDEX}/_search", json=body, timeout=30
+                    )
+                    ok = response.status_code == 200
+                except requests.exceptions.RequestException:
+                    ok = False
+                finished = time.perf_counter()
+                if sent >= warmup_end:
+                    samples.append((task, finished, finished - sent, ok))
+
+        with ThreadPoolExecutor(max_workers=clients) as executor:
+            list(executor.map(run_client, range(clients)))
+
+        results = []
+        for task in dict.fromkeys(tasks):
+            task_samples = [s for s in samples if s[0] == task]
+            if not task_samples:
+                continue
+            # Throughput per whole second of the measured window
+            seconds = max(1, int(deadline - warmup_end))
+            per_second = [0] * seconds
+            for _, finished, _, _ in task_samples:
+                per_second[min(seconds - 1, int(finished - warmup_end))] += 1
+            results += task_metrics(
+                task,
+                per_second,
+                [elapsed for _, _, elapsed, _ in task_samples],
+                sum(1 for _, _, _, ok in task_samples if not ok),
+                "ops/s",
+            )
+        return results
+
+    def benchmark_index_stats(self) -> list:
+        """Indexing time, store size and segment count of the benchmark index."""
+        response = self.client.get(f"{BENCHMARK_INDEX}/_stats", timeout=30)
+        primaries = response.json().get("_all", {}).get("primaries", {})
+        indexing_ms = primaries.get("indexing", {}).get("index_time_in_millis", 0)
+        store_bytes = primaries.get("store", {}).get("size_in_bytes", 0)
+        segments = primaries.get("segments", {}).get("count", 0)
+        return [
+            (
+                "Cumulative indexing time of primary shards",
+                "",
+                indexing_ms / 60000,
+                "min",
+            ),
+            ("Store size", "", store_bytes / 1024**3, "GB"),
+            ("Segment count", "", segments, ""),
+        ]
+
+    def run_benchmark(
+        self,
+        csv_path: str,
+        duration: float = 30,
+        num_docs: int = 10000,
+        clients: int = 4,
+    ) -> bool:
+        """Load synthetic data, run the query mix and write results to ``csv_path``."""
+        print(
+            f"\nBenchmarking {self.name} ({num_docs} docs, {duration:g}s query mix)..."
+        )
+        try:
+            self.client.delete(BENCHMARK_INDEX)
+            response = self.client.put(
+                BENCHMARK_INDEX, json=self.benchmark_index_body()
+            )
+            if response.status_code not in [200, 201]:
+                print(f"❌ Failed to create benchmark index: {response.status_code}")
+                print(response.text[:500])
+                return False
+            rows = self.benchmark_load(num_docs)
+            rows += self.benchmark_queries(duration, clients)
+            rows = self.benchmark_index_stats() + rows
+        except (requests.exceptions.RequestException, ValueError) as e:
+            print(f"❌ Benchmark error: {e}")
+            return False
+        finally:
+            try:
+                self.client.delete(BENCHMARK_INDEX)
+            except requests.exceptions.RequestException:
+                pass
+
+        write_benchmark_csv(csv_path, rows)
+        for metric, task, value, unit in rows:
+            if metric in ("Median Throughput", "90th percentile latency"):
+                print(f"   {task:13s} {metric:24s} {value:10.2f} {unit}")
+        print(f"✅ Benchmark results written to {csv_path}")
+        return True
+
     def validate(self) -> bool:
         """Run full validation."""
         success = True
@@ -239,8 +617,15 @@ class StackValidator:
                 success = False
                 return success
 
+            # Benchmark (optional)
+            if self.benchmark_options and not self.run_benchmark(
+                **self.benchmark_options
+            ):
+                success = False
+                return success
+
             # Check UI (optional, don't fail validation if it's not ready)
-            self.check_ui("http://localhost:5601", self.ui_name)
+            self.check_ui(self.ui_url, self.ui_name)
 
             if success:
                 print(f"\n{'=' * 60}")
@@ -256,9 +641,13 @@ class StackValidator:
 class ElasticOSSValidator(StackValidator):
     """Validator for Elastic OSS stack."""
 
+    memory_gb = 1
+    knn_style = None
+
     def __init__(self):
-        super().__init__("Elastic OSS", "docker/elk-oss/docker-compose.yml")
-        self.base_url = "http://localhost:9200"
+        super().__init__(
+            "Elastic OSS", "docker/elk-oss/docker-compose.yml", scheme="http"
+        )
         self.auth = None  # No auth for OSS
         self.verify_ssl = False
         self.ui_name = "Kibana OSS"
@@ -267,9 +656,13 @@ class ElasticOSSValidator(StackValidator):
 class OpenSearchValidator(StackValidator):
     """Validator for OpenSearch stack."""
 
+    memory_gb = 4
+    knn_style = "opensearch"
+
     def __init__(self):
-        super().__init__("OpenSearch", "docker/opensearch/docker-compose.yml")
-        self.base_url = "https://localhost:9200"
+        super().__init__(
+            "OpenSearch", "docker/opensearch/docker-compose.yml", scheme="https"
+        )
         self.auth = ("admin", "MyStrongPassword123!")  # From .env
         self.verify_ssl = False
         self.ui_name = "OpenSearch Dashboards"
@@ -278,9 +671,12 @@ class OpenSearchValidator(StackValidator):
 class ElasticValidator(StackValidator):
     """Validator for Elastic Stack."""
 
+    memory_gb = 3
+
     def __init__(self):
-        super().__init__("Elastic Stack", "docker/elk/docker-compose.yml")
-        self.base_url = "https://localhost:9200"
+        super().__init__(
+            "Elastic Stack", "docker/elk/docker-compose.yml", scheme="https"
+        )
         self.auth = ("elastic", "elastic")  # From .env
         self.verify_ssl = False
         self.ui_name = "Kibana"
@@ -289,9 +685,12 @@ class ElasticValidator(StackValidator):
 class ElasticSingleValidator(StackValidator):
     """Validator for Elastic Single-Node Stack (beginners)."""
 
+    memory_gb = 2
+
     def __init__(self):
-        super().__init__("Elastic Single", "docker/elk-single/docker-compose.yml")
-        self.base_url = "http://localhost:9200"
+        super().__init__(
+            "Elastic Single", "docker/elk-single/docker-compose.yml", scheme="http"
+        )
         self.auth = ("elastic", "elastic")  # From .env
         self.verify_ssl = True
         self.ui_name = "Kibana"
@@ -300,9 +699,10 @@ class ElasticSingleValidator(StackValidator):
 class Elastic9Validator(StackValidator):
     """Validator for Elasticsearch 9 single-node stack."""
 
+    memory_gb = 2
+
     def __init__(self):
-        super().__init__("Elastic 9", "docker/elk-9/docker-compose.yml")
-        self.base_url = "http://localhost:9200"
+        super().__init__("Elastic 9", "docker/elk-9/docker-compose.yml", scheme="http")
         self.auth = ("elastic", "elastic")  # From .env
         self.verify_ssl = True
         self.ui_name = "Kibana 9"
@@ -311,9 +711,13 @@ class Elastic9Validator(StackValidator):
 class OpenSearch3Validator(StackValidator):
     """Validator for OpenSearch 3 stack."""
 
+    memory_gb = 4
+    knn_style = "opensearch"
+
     def __init__(self):
-        super().__init__("OpenSearch 3", "docker/opensearch-3/docker-compose.yml")
-        self.base_url = "https://localhost:9200"
+        super().__init__(
+            "OpenSearch 3", "docker/opensearch-3/docker-compose.yml", scheme="https"
+        )
         self.auth = ("admin", "MyStrongPassword123!")  # From .env
         self.verify_ssl = False
         self.ui_name = "OpenSearch 3 Dashboards"
@@ -322,9 +726,12 @@ class OpenSearch3Validator(StackValidator):
 class ElasticMLValidator(StackValidator):
     """Validator for Elastic ML Stack (for ELSER and ML features)."""
 
+    memory_gb = 8
+
     def __init__(self):
-        super().__init__("Elastic ML", "docker/elk-ml/docker-compose.yml")
-        self.base_url = "https://localhost:9200"
+        super().__init__(
+            "Elastic ML", "docker/elk-ml/docker-compose.yml", scheme="https"
+        )
         self.auth = ("elastic", "elastic")  # From .env
         self.verify_ssl = False
         self.ui_name = "Kibana"
@@ -335,9 +742,7 @@ class ElasticMLValidator(StackValidator):
         url = f"{self.base_url}/_nodes"
 
         try:
-            response = requests.get(
-                url, auth=self.auth, verify=self.verify_ssl, timeout=10
-            )
+            response = self.client.get(url, timeout=10)
             if response.status_code == 200:
                 nodes = response.json().get("nodes", {})
                 ml_nodes = 0
@@ -381,11 +786,9 @@ class ElasticMLValidator(StackValidator):
                     }
                 }
             }
-            response = requests.put(
+            response = self.client.put(
                 url,
                 json=mapping,
-                auth=self.auth,
-                verify=self.verify_ssl,
                 timeout=10,
                 headers={"Content-Type": "application/json"},
             )
@@ -399,7 +802,7 @@ class ElasticMLValidator(StackValidator):
 
         # Add documents with embeddings
         try:
-            url = f"{self.base_url}/{index_name}/_bulk"
+            url = f"{self.base_url}/{index_name}/_bulk?refresh=wait_for"
             bulk_data = (
                 '{"index": {"_id": "1"}}\n'
                 '{"title": "Document A", "embedding": [0.5, 0.5, 0.5]}\n'
@@ -408,11 +811,9 @@ class ElasticMLValidator(StackValidator):
                 '{"index": {"_id": "3"}}\n'
                 '{"title": "Document C", "embedding": [0.9, 0.1, 0.1]}\n'
             )
-            response = requests.post(
+            response = self.client.post(
                 url,
                 data=bulk_data,
-                auth=self.auth,
-                verify=self.verify_ssl,
                 timeout=10,
                 headers={"Content-Type": "application/x-ndjson"},
             )
@@ -424,9 +825,6 @@ class ElasticMLValidator(StackValidator):
             print(f"❌ Vector indexing error: {e}")
             return False
 
-        # Wait for indexing
-        time.sleep(2)
-
         # Run kNN query
         try:
             url = f"{self.base_url}/{index_name}/_search"
@@ -438,11 +836,9 @@ class ElasticMLValidator(StackValidator):
                     "num_candidates": 10,
                 }
             }
-            response = requests.post(
+            response = self.client.post(
                 url,
                 json=query,
-                auth=self.auth,
-                verify=self.verify_ssl,
                 timeout=10,
                 headers={"Content-Type": "application/json"},
             )
@@ -495,8 +891,15 @@ class ElasticMLValidator(StackValidator):
                 success = False
                 return success
 
+            # Benchmark (optional)
+            if self.benchmark_options and not self.run_benchmark(
+                **self.benchmark_options
+            ):
+                success = False
+                return success
+
             # Check UI
-            self.check_ui("http://localhost:5601", self.ui_name)
+            self.check_ui(self.ui_url, self.ui_name)
 
             if success:
                 print(f"\n{'=' * 60}")
@@ -509,6 +912,109 @@ class ElasticMLValidator(StackValidator):
         return success
 
 
+def host_memory_gb() -> float:
+    """Total physical memory in GB, or 0 if it cannot be determined."""
+    try:
+        return os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES") / 1024**3
+    except (AttributeError, ValueError, OSError):
+        return 0.0
+
+
+def run_stack_subprocess(stack_name: str, slot: int, args) -> Tuple[bool, str, float]:
+    """Validate one stack in a child validate.py with its own ports and project.
+
+    Returns ``(passed, output, seconds)``.
+    """
+    cmd = [
+        sys.executable,
+        os.path.abspath(__file__),
+        "--stack",
+        stack_name,
+        "--port-offset",
+        str(slot * PORT_STRIDE),
+        "--project",
+        f"foe-validate-{stack_name}",
+        "--pool-size",
+        str(args.pool_size),
+    ]
+    if args.no_keep_alive:
+        cmd.append("--no-keep-alive")
+    if args.no_cleanup:
+        cmd.append("--no-cleanup")
+    if args.benchmark:
+        cmd += [
+            "--benchmark",
+            "--benchmark-duration",
+            str(args.benchmark_duration),
+            "--benchmark-docs",
+            str(args.benchmark_docs),
+            "--benchmark-clients",
+            str(args.benchmark_clients),
+            "--benchmark-dir",
+            args.benchmark_dir,
+        ]
+    start = time.monotonic()
+    result = subprocess.run(cmd, capture_output=True, text=True)
+    return (
+        result.returncode == 0,
+        result.stdout + result.stderr,
+        time.monotonic() - start,
+    )
+
+
+def run_parallel(
+    stacks: list, validators: Dict[str, StackValidator], args
+) -> Dict[str, Tuple[bool, float]]:
+    """Validate up to ``args.parallel`` stacks at once within the memory budget.
+
+    Stacks start in the given order as slots and memory free up; one that
+    does not fit waits while later, smaller ones go ahead. A stack larger
+    than the whole budget still runs, but only on its own.
+    """
+    budget = args.memory_budget or float("inf")
+    pending = list(stacks)
+    free_slots = list(range(args.parallel))
+    running = {}  # future -> (stack name, slot, memory)
+    used = 0.0
+    results = {}
+
+    with ThreadPoolExecutor(max_workers=args.parallel) as executor:
+        while pending or running:
+            for stack_name in list(pending):
+                memory = validators[stack_name].memory_gb
+                if not free_slots:
+                    break
+                if running and used + memory > budget:
+                    continue
+                slot = min(free_slots)
+                free_slots.remove(slot)
+                pending.remove(stack_name)
+                used += memory
+                print(
+                    f"▶ {stack_name}: started on port "
+                    f"{BASE_PORTS['ES_PORT'] + slot * PORT_STRIDE} "
+                    f"({memory} GB, {used:g}/{budget:g} GB in use)"
+                )
+                future = executor.submit(run_stack_subprocess, stack_name, slot, args)
+                running[future] = (stack_name, slot, memory)
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                stack_name, slot, memory = running.pop(future)
+                free_slots.append(slot)
+                used -= memory
+                passed, output, elapsed = future.result()
+                print(f"\n{'-' * 60}")
+                print(f"{stack_name} output")
+                print(f"{'-' * 60}")
+                print(output.rstrip())
+                status = "✅" if passed else "❌"
+                print(f"{status} {stack_name} finished in {elapsed:.0f}s\n")
+                results[stack_name] = (passed, elapsed)
+
+    return {stack_name: results[stack_name] for stack_name in stacks}
+
+
 def main():
     parser = argparse.ArgumentParser(description="Validate flavours-of-elastic stacks")
     parser.add_argument(
@@ -526,11 +1032,75 @@ def main():
         default="all",
         help="Which stack to validate (default: all)",
     )
+    parser.add_argument(
+        "--pool-size",
+        type=int,
+        default=es_client.DEFAULT_POOL_SIZE,
+        help="Pooled connections kept open per cluster "
+        f"(default: {es_client.DEFAULT_POOL_SIZE})",
+    )
+    parser.add_argument(
+        "--no-keep-alive",
+        action="store_true",
+        help="Close the connection after every request instead of reusing it",
+    )
     parser.add_argument(
         "--no-cleanup",
         action="store_true",
         help="Don't remove volumes after testing",
     )
+    parser.add_argument(
+        "--parallel",
+        type=int,
+        default=1,
+        help="Validate up to N stacks at once (default: 1, one after another)",
+    )
+    parser.add_argument(
+        "--memory-budget",
+        type=float,
+        default=round(host_memory_gb() * 0.75, 1),
+        help="With --parallel, GB of memory the running stacks may use together "
+        "(default: 75%% of host memory)",
+    )
+    parser.add_argument(
+        "--benchmark",
+        action="store_true",
+        help="Also bulk-load synthetic data and time a query mix on each stack",
+    )
+    parser.add_argument(
+        "--benchmark-duration",
+        type=float,
+        default=30,
+        help="Seconds to run the benchmark query mix (default: 30)",
+    )
+    parser.add_argument(
+        "--benchmark-docs",
+        type=int,
+        default=10000,
+        help="Synthetic documents to bulk-load (default: 10000)",
+    )
+    parser.add_argument(
+        "--benchmark-clients",
+        type=int,
+        default=4,
+        help="Concurrent query clients (default: 4)",
+    )
+    parser.add_argument(
+        "--benchmark-dir",
+        default="benchmarks",
+        help="Directory for <stack>-validate.csv results (default: benchmarks)",
+    )
+    parser.add_argument(
+        "--port-offset",
+        type=int,
+        default=0,
+        help="Shift the stack's published host ports by this amount (default: 0)",
+    )
+    parser.add_argument(
+        "--project",
+        default=None,
+        help="Docker compose project name (default: compose's own)",
+    )
 
     args = parser.parse_args()
 
@@ -554,10 +1124,34 @@ def main():
     print("=" * 60)
     print(f"\nTesting stacks: {', '.join(stacks_to_test)}")
 
-    results = {}
-    for stack_name in stacks_to_test:
-        validator = validators[stack_name]
-        results[stack_name] = validator.validate()
+    start = time.monotonic()
+    if args.parallel > 1 and len(stacks_to_test) > 1:
+        print(
+            f"Running up to {args.parallel} stacks at once "
+            f"within {args.memory_budget:g} GB"
+        )
+        results = run_parallel(stacks_to_test, validators, args)
+    else:
+        results = {}
+        for stack_name in stacks_to_test:
+            validator = validators[stack_name]
+            validator.pool_size = max(args.pool_size, args.benchmark_clients)
+            validator.keep_alive = not args.no_keep_alive
+            if args.benchmark:
+                validator.benchmark_options = {
+                    "csv_path": os.path.join(
+                        args.benchmark_dir, f"{stack_name}-validate.csv"
+                    ),
+                    "duration": args.benchmark_duration,
+                    "num_docs": args.benchmark_docs,
+                    "clients": args.benchmark_clients,
+                }
+            validator.port_offset = args.port_offset
+            validator.project = args.project
+            stack_start = time.monotonic()
+            passed = validator.validate()
+            results[stack_name] = (passed, time.monotonic() - stack_start)
+    wall_time = time.monotonic() - start
 
     # Summary
     print("\n" + "=" * 60)
@@ -565,12 +1159,16 @@ def main():
     print("=" * 60)
 
     all_passed = True
-    for stack_name, passed in results.items():
+    for stack_name, (passed, elapsed) in results.items():
         status = "✅ PASSED" if passed else "❌ FAILED"
-        print(f"{stack_name:15s}: {status}")
+        print(f"{stack_name:15s}: {status}  {elapsed:6.0f}s")
         if not passed:
             all_passed = False
 
+    stack_time = sum(elapsed for _, elapsed in results.values())
+    print(
+        f"{'total':15s}: {wall_time:.0f}s wall time ({stack_time:.0f}s of stack time)"
+    )
     print("=" * 60)
 
     if all_passed: